@@ -0,0 +1,337 @@
+import threading
+
+import numpy as np
+import pygame
+from panda3d.core import Datagram, Filename, MovieAudio
+
+# Parámetros del análisis: ~23 ms por hop a 44.1 kHz
+HOP_SIZE = 1024
+WINDOW_SIZE = 2048
+NUM_BANDS = 8
+MIN_FREQUENCY = 40.0
+# Esferas por banda de frecuencia como máximo en la visualización multibanda
+MAX_SPHERE_BANDS = 16
+
+# Percentil que se toma como nivel "máximo" al normalizar las envolventes
+NORMALIZATION_PERCENTILE = 95
+# Hops promediados para suavizar la envolvente
+SMOOTHING_FRAMES = 3
+
+# Análisis en vivo: capacidad del buffer circular (~6 s) y adelanto máximo sobre la reproducción
+RING_CAPACITY = 256
+ANALYSIS_LOOKAHEAD = 0.5
+# Vida media (en segundos) del pico usado para normalizar en vivo
+PEAK_HALF_LIFE = 10.0
+# Historial (~1 s) y sensibilidad de la detección de onsets por flujo espectral
+ONSET_HISTORY = 43
+ONSET_SENSITIVITY = 1.5
+# Bandas graves usadas para los beats y tiempo mínimo entre beats
+BEAT_BANDS = 2
+BEAT_REFRACTORY = 0.25
+
+
+class AudioEnvelope:
+    """Envolvente precalculada de una pista: amplitud RMS y energía por banda en cada hop"""
+
+    def __init__(self, rms, bands, frame_rate):
+        self.rms = np.asarray(rms, dtype=np.float32)
+        self.bands = np.asarray(bands, dtype=np.float32)
+        self.frame_rate = frame_rate  # Hops por segundo
+        self.num_frames = len(self.rms)
+        self.duration = self.num_frames / frame_rate
+
+    def frame_at(self, seconds):
+        """Índice del hop que suena en `seconds`, contando con la reproducción en bucle"""
+        return int(seconds * self.frame_rate) % self.num_frames
+
+    def amplitude_at(self, seconds):
+        """Amplitud normalizada (0-1) en el instante `seconds`"""
+        return float(self.rms[self.frame_at(seconds)])
+
+    def bands_at(self, seconds):
+        """Energía normalizada (0-1) de cada banda en el instante `seconds`"""
+        return self.bands[self.frame_at(seconds)]
+
+
+def decode_track(path):
+    """Decodificar una pista completa a muestras mono float32 con el formato del mixer"""
+    sample_rate = pygame.mixer.get_init()[0]
+    samples = pygame.sndarray.array(pygame.mixer.Sound(path))
+    # La escala se toma del tipo entero antes de mezclar los canales, que ya da floats
+    scale = float(np.iinfo(samples.dtype).max) if np.issubdtype(samples.dtype, np.integer) else 1.0
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    return (samples / scale).astype(np.float32), sample_rate
+
+
+def band_edges(sample_rate, num_bands=NUM_BANDS, min_frequency=MIN_FREQUENCY):
+    """Límites logarítmicos de las bandas entre `min_frequency` y la frecuencia de Nyquist"""
+    return np.geomspace(min_frequency, sample_rate / 2.0, num_bands + 1)
+
+
+def band_bin_ranges(sample_rate, window_size=WINDOW_SIZE, num_bands=NUM_BANDS):
+    """Primer y último (exclusivo) bin de la FFT que cae en cada banda"""
+    frequencies = np.fft.rfftfreq(window_size, 1.0 / sample_rate)
+    edges = band_edges(sample_rate, num_bands)
+    bin_edges = np.searchsorted(frequencies, edges, side="left")
+    return bin_edges[:-1], bin_edges[1:]
+
+
+def resample_bands(bands, count):
+    """Energía de `count` bandas a partir de las del análisis
+
+    Con menos bandas se promedian grupos contiguos (graves, medios, agudos con 3); con más
+    se interpola entre bandas vecinas.
+    """
+    bands = np.asarray(bands, dtype=np.float64)
+    if count == len(bands):
+        return bands
+    if count < len(bands):
+        edges = np.linspace(0, len(bands), count + 1).astype(np.int64)
+        return np.add.reduceat(bands, edges[:-1]) / np.diff(edges)
+    return np.interp(np.linspace(0, len(bands) - 1, count), np.arange(len(bands)), bands)
+
+
+def normalize_envelope(values):
+    """Escalar una envolvente a 0-1 respecto a su percentil alto y suavizarla"""
+    if SMOOTHING_FRAMES > 1 and len(values) >= SMOOTHING_FRAMES:
+        kernel = np.full(SMOOTHING_FRAMES, 1.0 / SMOOTHING_FRAMES, dtype=np.float32)
+        values = np.apply_along_axis(np.convolve, 0, values, kernel, mode="same")
+    reference = np.percentile(values, NORMALIZATION_PERCENTILE, axis=0)
+    reference = np.where(reference > 0, reference, 1.0)
+    return np.clip(values / reference, 0.0, 1.0).astype(np.float32)
+
+
+def analyze_samples(samples, sample_rate, hop_size=HOP_SIZE, window_size=WINDOW_SIZE,
+                    num_bands=NUM_BANDS, chunk_frames=512):
+    """Calcular la envolvente RMS y la energía por banda de cada hop de `samples`
+
+    El análisis se hace por bloques de `chunk_frames` ventanas para acotar la memoria.
+    """
+    num_frames = max(1, len(samples) // hop_size)
+    padding = num_frames * hop_size + window_size - len(samples)
+    padded = np.pad(samples, (0, max(0, padding)))
+    window = np.hanning(window_size).astype(np.float32)
+    band_starts, band_stops = band_bin_ranges(sample_rate, window_size, num_bands)
+
+    rms = np.empty(num_frames, dtype=np.float32)
+    bands = np.empty((num_frames, num_bands), dtype=np.float32)
+    for first in range(0, num_frames, chunk_frames):
+        last = min(num_frames, first + chunk_frames)
+        block = padded[first * hop_size:(last - 1) * hop_size + window_size]
+        frames = np.lib.stride_tricks.sliding_window_view(block, window_size)[::hop_size]
+
+        rms[first:last] = np.sqrt(np.mean(frames * frames, axis=1))
+
+        power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+        cumulative = np.concatenate(
+            (np.zeros((len(power), 1)), np.cumsum(power, axis=1)), axis=1
+        )
+        # Energía como amplitud (raíz de la potencia) para que sea comparable a la RMS
+        bands[first:last] = np.sqrt(cumulative[:, band_stops] - cumulative[:, band_starts])
+
+    return AudioEnvelope(
+        normalize_envelope(rms),
+        normalize_envelope(bands),
+        sample_rate / hop_size
+    )
+
+
+def analyze_track(path, hop_size=HOP_SIZE, window_size=WINDOW_SIZE, num_bands=NUM_BANDS):
+    """Decodificar una pista una sola vez y precalcular su envolvente"""
+    samples, sample_rate = decode_track(path)
+    return analyze_samples(samples, sample_rate, hop_size, window_size, num_bands)
+
+
+def open_pcm_stream(path, chunk_size=HOP_SIZE * 8, loop=True):
+    """Abrir una pista para decodificarla por bloques a medida que se consume
+
+    Devuelve un generador de bloques de muestras mono float32 y su frecuencia de muestreo.
+    Con el decodificador de Panda3D (ffmpeg) la pista se decodifica bloque a bloque y solo
+    el bloque actual está en memoria, así que el coste no depende de su duración. Si no está
+    disponible, se decodifica completa con el mixer (`pcm_chunks`).
+    """
+    cursor = MovieAudio.get(Filename.from_os_specific(path)).open()
+    if cursor is None:
+        return pcm_chunks(path, chunk_size, loop), pygame.mixer.get_init()[0]
+    return cursor_chunks(cursor, chunk_size, loop), cursor.audio_rate()
+
+
+def cursor_chunks(cursor, chunk_size=HOP_SIZE * 8, loop=True):
+    """Generar bloques mono float32 leyendo de un MovieAudioCursor; con `loop`, en bucle"""
+    channels = cursor.audio_channels()
+    # Pasado el final el cursor sigue devolviendo silencio: se corta en la duración de la pista
+    total = int(round(cursor.length() * cursor.audio_rate()))
+    while True:
+        position = 0
+        while position < total:
+            count = min(chunk_size, total - position)
+            datagram = Datagram()
+            cursor.read_samples(count, datagram)
+            samples = np.frombuffer(datagram.get_message(), dtype=np.int16).reshape(-1, channels)
+            yield samples.mean(axis=1, dtype=np.float32) / np.float32(np.iinfo(np.int16).max)
+            position += count
+        if not loop:
+            return
+        cursor.seek(0.0)
+
+
+def pcm_chunks(path, chunk_size=HOP_SIZE * 8, loop=True):
+    """Generar la pista decodificada en bloques de muestras mono float32
+
+    La pista se decodifica completa al pedir el primer bloque, en el hilo que consume el
+    generador. Con `loop` la pista se repite como en la reproducción en bucle.
+    """
+    samples, _ = decode_track(path)
+    while True:
+        for start in range(0, len(samples), chunk_size):
+            yield samples[start:start + chunk_size]
+        if not loop:
+            return
+
+
+class AnalysisRingBuffer:
+    """Buffer circular de tamaño fijo con los últimos hops analizados
+
+    Un único hilo escribe y el hilo de render lee sin bloqueos: el escritor rellena la
+    ranura y solo después publica el nuevo contador, así que el lector nunca ve una ranura
+    a medio escribir mientras el escritor no le saque una vuelta completa de ventaja.
+    """
+
+    def __init__(self, capacity, num_bands):
+        self.capacity = capacity
+        self.rms = np.zeros(capacity, dtype=np.float32)
+        self.bands = np.zeros((capacity, num_bands), dtype=np.float32)
+        self.onsets = np.zeros(capacity, dtype=bool)
+        self.beats = np.zeros(capacity, dtype=bool)
+        self.written = 0  # Hops publicados desde el inicio
+
+    def publish(self, rms, bands, onset, beat):
+        """Escribir un hop en la siguiente ranura y publicarlo"""
+        slot = self.written % self.capacity
+        self.rms[slot] = rms
+        self.bands[slot] = bands
+        self.onsets[slot] = onset
+        self.beats[slot] = beat
+        self.written += 1
+
+    def read(self, frame):
+        """Devolver (rms, bandas, onset, beat) del hop `frame`, o del más cercano disponible"""
+        written = self.written
+        if written == 0:
+            return None
+        frame = max(written - self.capacity, min(frame, written - 1))
+        slot = frame % self.capacity
+        return float(self.rms[slot]), self.bands[slot].copy(), bool(self.onsets[slot]), bool(self.beats[slot])
+
+
+class AudioAnalysisWorker(threading.Thread):
+    """Hilo que analiza PCM por bloques y publica los resultados en un AnalysisRingBuffer
+
+    Calcula por cada hop la RMS, la energía por banda (STFT) y flags de onset y beat por flujo
+    espectral. Con `position` (segundos de reproducción) el hilo se mantiene solo
+    `lookahead` segundos por delante, de modo que sirve también para fuentes en vivo o
+    pistas demasiado largas para analizarlas por adelantado.
+    """
+
+    def __init__(self, chunks, sample_rate, position=None, lookahead=ANALYSIS_LOOKAHEAD,
+                 hop_size=HOP_SIZE, window_size=WINDOW_SIZE, num_bands=NUM_BANDS,
+                 capacity=RING_CAPACITY):
+        super().__init__(name="audio-analysis", daemon=True)
+        self.chunks = chunks
+        self.sample_rate = sample_rate
+        self.position = position
+        self.lookahead = lookahead
+        self.hop_size = hop_size
+        self.window_size = window_size
+        self.frame_rate = sample_rate / hop_size
+        self.ring = AnalysisRingBuffer(capacity, num_bands)
+        self._stop_event = threading.Event()
+
+        self._window = np.hanning(window_size).astype(np.float32)
+        self._band_starts, self._band_stops = band_bin_ranges(sample_rate, window_size, num_bands)
+        self._peak_decay = 0.5 ** (1.0 / (PEAK_HALF_LIFE * self.frame_rate))
+        self._rms_peak = 1e-6
+        self._band_peaks = np.full(num_bands, 1e-6)
+        self._previous_spectrum = None
+        self._flux_history = np.zeros((ONSET_HISTORY, 2))
+        self._last_beat = -BEAT_REFRACTORY
+
+    def stop(self, wait=True):
+        """Pedir al hilo que termine y, con `wait`, esperarlo brevemente"""
+        self._stop_event.set()
+        if wait and self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=1.0)
+
+    def frame_at(self, seconds):
+        """Índice del hop que suena en `seconds` de reproducción"""
+        return int(seconds * self.frame_rate)
+
+    def read(self, seconds):
+        """Lectura sin bloqueo del análisis correspondiente a `seconds` de reproducción"""
+        return self.ring.read(self.frame_at(seconds))
+
+    def run(self):
+        pending = np.zeros(0, dtype=np.float32)
+        for chunk in self.chunks:
+            if self._stop_event.is_set():
+                return
+            pending = np.concatenate((pending, chunk))
+            if len(pending) < self.window_size:
+                continue
+
+            frames = np.lib.stride_tricks.sliding_window_view(pending, self.window_size)[::self.hop_size]
+            spectra = np.abs(np.fft.rfft(frames * self._window, axis=1))
+            rms = np.sqrt(np.mean(frames * frames, axis=1))
+            pending = pending[len(frames) * self.hop_size:]
+
+            for frame_rms, spectrum in zip(rms, spectra):
+                self._analyze_frame(frame_rms, spectrum)
+                self._wait_for_playback()
+                if self._stop_event.is_set():
+                    return
+
+    def _wait_for_playback(self):
+        """Esperar mientras el análisis vaya más de `lookahead` segundos por delante"""
+        if self.position is None:
+            return
+        hop_duration = self.hop_size / self.sample_rate
+        while (not self._stop_event.is_set()
+               and self.ring.written / self.frame_rate > self.position() + self.lookahead):
+            self._stop_event.wait(hop_duration)
+
+    def _analyze_frame(self, rms, spectrum):
+        """Normalizar un hop, detectar onsets y beats y publicarlo"""
+        power = spectrum * spectrum
+        cumulative = np.concatenate(([0.0], np.cumsum(power)))
+        bands = np.sqrt(cumulative[self._band_stops] - cumulative[self._band_starts])
+
+        # Normalización automática respecto a un pico que decae lentamente
+        self._rms_peak = max(rms, self._rms_peak * self._peak_decay)
+        self._band_peaks = np.maximum(bands, self._band_peaks * self._peak_decay)
+        normalized_rms = min(1.0, rms / self._rms_peak)
+        normalized_bands = np.minimum(1.0, bands / self._band_peaks)
+
+        # Flujo espectral (total y de las bandas graves) sobre la magnitud logarítmica
+        log_spectrum = np.log1p(spectrum)
+        if self._previous_spectrum is None:
+            self._previous_spectrum = log_spectrum
+        rise = np.maximum(0.0, log_spectrum - self._previous_spectrum)
+        self._previous_spectrum = log_spectrum
+        flux = np.array((rise.sum(), rise[:self._band_stops[BEAT_BANDS - 1]].sum()))
+
+        threshold = (
+            self._flux_history.mean(axis=0)
+            + ONSET_SENSITIVITY * self._flux_history.std(axis=0)
+        )
+        # Sin historial suficiente todavía no hay umbral fiable
+        warmed_up = self.ring.written >= ONSET_HISTORY
+        onset, bass_onset = (flux > threshold) & warmed_up
+        self._flux_history[self.ring.written % ONSET_HISTORY] = flux
+
+        now = self.ring.written / self.frame_rate
+        beat = bool(bass_onset) and now - self._last_beat >= BEAT_REFRACTORY
+        if beat:
+            self._last_beat = now
+
+        self.ring.publish(normalized_rms, normalized_bands, bool(onset), beat)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pygame
+
+from panda3d_animacion.audio import (
+    HOP_SIZE,
+    NUM_BANDS,
+    WINDOW_SIZE,
+    AudioEnvelope,
+    analyze_track,
+)
+
+# Cambiar al modificar el algoritmo de análisis para invalidar las entradas antiguas
+ANALYSIS_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def default_cache_directory(name="audio"):
+    """Directorio de caché `name` del usuario (respeta XDG_CACHE_HOME)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "panda3d_animacion", name)
+
+
+def content_hash(path):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as audio_file:
+        for block in iter(lambda: audio_file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Caché en disco de envolventes de audio, abiertas con numpy.memmap y con expulsión LRU
+
+    Cada pista se guarda como un único archivo .npy float32 de forma (hops, 1 + bandas):
+    la primera columna es la RMS y el resto la energía por banda. La clave combina el hash
+    del contenido con los parámetros del análisis, así que renombrar un archivo no invalida
+    su entrada y cambiar los parámetros no reutiliza una incompatible.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        self.analyses = {}  # Hilos de análisis en segundo plano por clave
+
+    def key(self, path, sample_rate, hop_size=HOP_SIZE, window_size=WINDOW_SIZE,
+            num_bands=NUM_BANDS):
+        """Clave de la entrada de `path` para unos parámetros de análisis"""
+        parameters = f"v{ANALYSIS_VERSION}-{sample_rate}-{hop_size}-{window_size}-{num_bands}"
+        return f"{content_hash(path)}-{parameters}"
+
+    def entry_path(self, key):
+        """Ruta del archivo de la entrada `key`"""
+        return os.path.join(self.directory, key + ".npy")
+
+    def load(self, key, sample_rate, hop_size=HOP_SIZE):
+        """Abrir la envolvente de `key` como memmap de solo lectura, o None si no está"""
+        entry = self.entry_path(key)
+        try:
+            data = np.load(entry, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        # Marcar la entrada como usada recientemente para la expulsión LRU
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return AudioEnvelope(data[:, 0], data[:, 1:], sample_rate / hop_size)
+
+    def store(self, key, envelope):
+        """Guardar una envolvente de forma atómica y expulsar entradas si se supera el límite"""
+        os.makedirs(self.directory, exist_ok=True)
+        data = np.column_stack((envelope.rms, envelope.bands)).astype(np.float32)
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as entry_file:
+                np.save(entry_file, data)
+            os.replace(temporary, self.entry_path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Borrar las entradas usadas hace más tiempo hasta quedar por debajo de `max_bytes`"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npy"):
+                continue
+            entry = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+
+    def analyze_in_background(self, path, key):
+        """Analizar la pista completa en un hilo y guardarla en la caché (un solo hilo por clave)"""
+        def analyze():
+            try:
+                self.store(key, analyze_track(path))
+            except (pygame.error, OSError, ValueError) as e:
+                print(f"No se pudo guardar el análisis de {os.path.basename(path)}: {e}")
+
+        thread = self.analyses.get(key)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=analyze, name="audio-cache", daemon=True)
+        self.analyses[key] = thread
+        thread.start()
+        return thread
+
+    def wait(self, key):
+        """Esperar a que termine el análisis en segundo plano de `key`, si hay uno en marcha"""
+        thread = self.analyses.get(key)
+        if thread is not None:
+            thread.join()
+
+    def analyzing(self, key):
+        """Si el análisis en segundo plano de `key` sigue en marcha"""
+        thread = self.analyses.get(key)
+        return thread is not None and thread.is_alive()
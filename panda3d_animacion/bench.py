@@ -0,0 +1,269 @@
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from panda3d_animacion.profiling import PROFILED_PHASES, FrameProfiler
+from panda3d_animacion.quality import DEFAULT_RENDER_MODE, RENDER_MODES
+from panda3d_animacion.satellites import (
+    SatelliteSystem,
+    find_close_pairs,
+    find_close_pairs_bruteforce,
+)
+
+# Por encima de este número de satélites la búsqueda O(n²) ocupa demasiada memoria
+BRUTEFORCE_LIMIT = 4000
+
+# Fases de OrganicSphere.advance que se miden por separado, más el render del frame
+SCENE_PHASES = tuple(label for _, label in PROFILED_PHASES) + ("render",)
+
+
+def time_call(function, repeats):
+    """Tiempo medio en milisegundos de `repeats` llamadas a `function`"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def bench_satellite_collisions(counts, steps, dt=1.0 / 60.0, seed=0):
+    """Medir cómo escala la física de satélites con colisiones entre ellos"""
+    results = []
+    for count in counts:
+        system = SatelliteSystem(count, rng=np.random.default_rng(seed))
+
+        # Calentar la simulación para partir de una distribución realista
+        for frame in range(30):
+            system.step(dt, frame * dt, 0.5)
+
+        frame = 30
+
+        def step():
+            nonlocal frame
+            system.step(dt, frame * dt, 0.5)
+            frame += 1
+
+        contact_distance = 2 * system.satellite_radius
+        positions = system.positions.copy()
+        result = {
+            "satellites": count,
+            "step_ms": time_call(step, steps),
+            "grid_ms": time_call(lambda: find_close_pairs(positions, contact_distance), steps),
+            "bruteforce_ms": None,
+            "pairs": len(find_close_pairs(positions, contact_distance)[0]),
+        }
+        if count <= BRUTEFORCE_LIMIT:
+            result["bruteforce_ms"] = time_call(
+                lambda: find_close_pairs_bruteforce(positions, contact_distance),
+                max(1, steps // 10)
+            )
+        results.append(result)
+    return results
+
+
+def print_collision_results(results):
+    """Mostrar los resultados de colisiones como tabla"""
+    print(f"{'satélites':>10} {'paso (ms)':>10} {'rejilla (ms)':>13} {'O(n²) (ms)':>11} {'µs/satélite':>12} {'pares':>7}")
+    for result in results:
+        bruteforce = result["bruteforce_ms"]
+        bruteforce_text = f"{bruteforce:11.3f}" if bruteforce is not None else f"{'-':>11}"
+        per_satellite = result["step_ms"] * 1000.0 / result["satellites"]
+        print(
+            f"{result['satellites']:>10} {result['step_ms']:10.3f} {result['grid_ms']:13.3f} "
+            f"{bruteforce_text} {per_satellite:12.3f} {result['pairs']:>7}"
+        )
+
+
+def percentiles(values):
+    """Resumen p50/p95/p99 y media (en ms) de una lista de tiempos en segundos"""
+    values = np.asarray(values) * 1000.0
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+    }
+
+
+def configure_headless(window_type, display, size=None):
+    """Configurar Panda3D sin ventana visible, sin audio y sin esperar al vsync"""
+    from panda3d.core import loadPrcFileData
+
+    settings = [
+        f"window-type {window_type}",
+        f"load-display {display}",
+        "audio-library-name null",
+        "sync-video false",
+    ]
+    if size is not None:
+        settings.append(f"win-size {size[0]} {size[1]}")
+    loadPrcFileData("bench", "\n".join(settings))
+
+
+def bench_scene(segments, num_satellites, frames, warmup=30, dt=1.0 / 60.0,
+                window_type="offscreen", display="p3tinydisplay", camera_radius=None,
+                render_mode=DEFAULT_RENDER_MODE, simulation_process=False, seed=0, sphere_bands=1):
+    """Medir el tiempo por frame de OrganicSphere sin ventana y con un paso de tiempo fijo"""
+    configure_headless(window_type, display)
+    from panda3d_animacion.main import OrganicSphere
+
+    app = OrganicSphere(
+        segments=segments, num_satellites=num_satellites, audio=False, render_mode=render_mode,
+        simulation_process=simulation_process, seed=seed, sphere_bands=sphere_bands
+    )
+    if camera_radius is not None:
+        # Distancia de la cámara (y con ella el nivel de detalle) a medir
+        app.camera_radius = camera_radius
+        app.update_camera()
+
+    # Medir cada fase con el mismo perfilador que usa la aplicación
+    rows = []
+    FrameProfiler(app).enable(sink=rows.append)
+    render_times = []
+
+    frame_times = []
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            frame_times.clear()
+            render_times.clear()
+            rows.clear()
+        start = time.perf_counter()
+        app.advance(dt)
+        render_start = time.perf_counter()
+        app.graphicsEngine.renderFrame()
+        end = time.perf_counter()
+        render_times.append(end - render_start)
+        frame_times.append(end - start)
+
+    result = {
+        "segments": segments,
+        "satellites": num_satellites,
+        "camera_radius": app.camera_radius,
+        "render_mode": render_mode,
+        "simulation_process": simulation_process,
+        "bands": sphere_bands,
+        "detail_level": app.detail_level,
+        "frames": frames,
+        "frame_ms": percentiles(frame_times),
+        "phases_ms": dict(
+            {label: float(np.mean([row[label] for row in rows])) for _, label in PROFILED_PHASES},
+            render=float(np.mean(render_times)) * 1000.0
+        ),
+    }
+    app.destroy()
+    return result
+
+
+def bench_scene_sweep(segment_counts, satellite_counts, frames, warmup, window_type, display,
+                      camera_radii=(None,), render_modes=(DEFAULT_RENDER_MODE,),
+                      simulation_process=False, sphere_bands=1):
+    """Ejecutar `bench_scene` para cada combinación, cada una en su propio proceso"""
+    results = []
+    for segments, num_satellites, camera_radius, render_mode in itertools.product(
+        segment_counts, satellite_counts, camera_radii, render_modes
+    ):
+        command = [
+            sys.executable, "-m", "panda3d_animacion.bench", "scene",
+            "--segments", str(segments),
+            "--satellites", str(num_satellites),
+            "--render-mode", render_mode,
+            "--frames", str(frames),
+            "--warmup", str(warmup),
+            "--window-type", window_type,
+            "--display", display,
+            "--json",
+        ]
+        if camera_radius is not None:
+            command += ["--camera-radius", str(camera_radius)]
+        if simulation_process:
+            command.append("--sim-process")
+        if sphere_bands != 1:
+            command += ["--bands", str(sphere_bands)]
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def print_scene_results(results):
+    """Mostrar los resultados de la escena como tabla"""
+    print(f"{'segmentos':>9} {'satélites':>9} {'cámara':>7} {'lod':>3} {'modo':>8} {'p50':>8} {'p95':>8} {'p99':>8}  fases (ms medios)")
+    for result in results:
+        frame_ms = result["frame_ms"]
+        phases = " ".join(f"{name}={result['phases_ms'][name]:.3f}" for name in SCENE_PHASES)
+        print(
+            f"{result['segments']:>9} {result['satellites']:>9} {result['camera_radius']:7.1f} "
+            f"{result['detail_level']:>3} {result['render_mode']:>8} {frame_ms['p50']:8.3f} "
+            f"{frame_ms['p95']:8.3f} {frame_ms['p99']:8.3f}  {phases}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de rendimiento de la animación orgánica"
+    )
+    suites = parser.add_subparsers(dest="suite", required=True)
+
+    collisions = suites.add_parser(
+        "collisions",
+        help="escalado de la física de satélites con colisiones entre ellos"
+    )
+    collisions.add_argument("--counts", type=int, nargs="+", default=[500, 1000, 2000, 4000, 8000])
+    collisions.add_argument("--steps", type=int, default=100)
+
+    scene = suites.add_parser(
+        "scene",
+        help="frame time de la escena completa sin ventana, con paso fijo y audio simulado"
+    )
+    scene.add_argument("--segments", type=int, nargs="+", default=[30])
+    scene.add_argument("--satellites", type=int, nargs="+", default=[10])
+    scene.add_argument("--camera-radius", type=float, nargs="+", default=[None],
+                       help="distancia de la cámara (5-50), que decide el nivel de detalle")
+    scene.add_argument("--render-mode", choices=RENDER_MODES, nargs="+",
+                       default=[DEFAULT_RENDER_MODE],
+                       help="modos de dibujo de los segmentos a comparar")
+    scene.add_argument("--sim-process", action="store_true",
+                       help="calcular la deformación y la física en un proceso aparte")
+    scene.add_argument("--bands", type=int, default=1,
+                       help="esferas, una por banda de frecuencia, con audio simulado")
+    scene.add_argument("--frames", type=int, default=300)
+    scene.add_argument("--warmup", type=int, default=30)
+    scene.add_argument("--window-type", choices=("offscreen", "none"), default="offscreen")
+    scene.add_argument("--display", default="p3tinydisplay",
+                       help="módulo de display de Panda3D (p3tinydisplay renderiza por CPU)")
+    scene.add_argument("--output", help="guardar los resultados en este archivo JSON")
+    scene.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+    if args.suite == "collisions":
+        print_collision_results(bench_satellite_collisions(args.counts, args.steps))
+    elif args.suite == "scene":
+        if (len(args.segments) == 1 and len(args.satellites) == 1
+                and len(args.camera_radius) == 1 and len(args.render_mode) == 1):
+            results = [bench_scene(
+                args.segments[0], args.satellites[0], args.frames, args.warmup,
+                window_type=args.window_type, display=args.display,
+                camera_radius=args.camera_radius[0], render_mode=args.render_mode[0],
+                simulation_process=args.sim_process, sphere_bands=args.bands
+            )]
+        else:
+            results = bench_scene_sweep(
+                args.segments, args.satellites, args.frames, args.warmup,
+                args.window_type, args.display, args.camera_radius, args.render_mode,
+                args.sim_process, args.bands
+            )
+
+        if args.json:
+            print(json.dumps(results[0]))
+            return
+        print_scene_results(results)
+        if args.output:
+            with open(args.output, "w") as output_file:
+                json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
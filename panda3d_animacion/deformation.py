@@ -0,0 +1,349 @@
+import math
+
+import numpy as np
+
+# Colores base rojos de los satélites, como la esfera principal
+SATELLITE_BASE_COLORS = np.array([
+    (0.9, 0.1, 0.1),  # Rojo intenso
+    (0.8, 0.15, 0.05),  # Rojo con toque naranja
+    (0.85, 0.05, 0.15),  # Rojo con toque magenta
+    (0.95, 0.08, 0.08),  # Rojo muy puro
+], dtype=np.float32)
+
+
+# Ondas que son cosenos (el resto son senos): deformación de la esfera 1-4, color R, G, B
+# de la esfera y deformación de los satélites 1-3
+SPHERE_COSINE_WAVES = np.array([False, True, False, False])
+SPHERE_COLOR_COSINE_WAVES = np.array([False, True, False])
+SATELLITE_COSINE_WAVES = np.array([False, True, False])
+
+
+def unit_directions(original_positions):
+    """Longitud y dirección unitaria de cada posición de reposo (dirección nula en el origen)"""
+    length = np.sqrt(np.einsum("ij,ij->i", original_positions, original_positions))
+    inverse = np.divide(1.0, length, out=np.zeros_like(length), where=length > 0)
+    return length, original_positions * inverse[:, None]
+
+
+def wave_coefficients(angles, cosine_waves):
+    """Coeficientes de cos(fase) y sin(fase) que dan sin(ángulo + fase) o cos(ángulo + fase)
+
+    sin(a + b) = sin a · cos b + cos a · sin b y cos(a + b) = cos a · cos b − sin a · sin b, así
+    que cada onda es una combinación de las tablas de coseno y seno de la fase espacial.
+    """
+    sin_angle = np.sin(angles)
+    cos_angle = np.cos(angles)
+    mask = cosine_waves.reshape(cosine_waves.shape + (1,) * (sin_angle.ndim - 1))
+    cos_coefficient = np.where(mask, cos_angle, sin_angle).astype(np.float32)
+    sin_coefficient = np.where(mask, -sin_angle, cos_angle).astype(np.float32)
+    return cos_coefficient, sin_coefficient
+
+
+class SphereDeformation:
+    """Tablas precalculadas por segmento de la esfera para deformarla y colorearla cada frame
+
+    Las fases espaciales de cada onda (x * 1.2, z * 0.22...) no cambian entre frames, así que
+    se guardan su coseno y su seno. Cada frame solo calcula un seno y un coseno por onda
+    (escalares, dependientes del tiempo) y todas las ondas salen de un único producto-suma
+    sobre las tablas, en lugar de un seno por segmento y onda. La deformación y el color se
+    calculan por separado para poder actualizar el color (lento) solo por tramos.
+
+    Con un vector de amplitudes (una por banda de frecuencia) se deforman a la vez varias
+    esferas que comparten estas tablas: las ondas de todas salen del mismo producto-suma.
+    """
+
+    def __init__(self, original_vertices):
+        original_vertices = np.asarray(original_vertices, dtype=np.float64)
+        length, directions = unit_directions(original_vertices)
+        x = original_vertices[:, 0]
+        y = original_vertices[:, 1]
+        z = original_vertices[:, 2]
+
+        self.original_vertices = original_vertices.astype(np.float32)
+        self.directions = directions.astype(np.float32)
+
+        # Fases espaciales de las cuatro ondas de deformación y de los tres canales de color
+        phases = np.stack((x * 1.0, y * 1.2, z * 1.4, length * 1.0))
+        self.cos_phase = np.cos(phases).astype(np.float32)
+        self.sin_phase = np.sin(phases).astype(np.float32)
+        color_phases = np.stack((x * 0.2, y * 0.25, z * 0.22))
+        self.cos_color_phase = np.cos(color_phases).astype(np.float32)
+        self.sin_color_phase = np.sin(color_phases).astype(np.float32)
+
+    def deform(self, time, audio_amplitude, deformation_factor):
+        """Posiciones (..., N, 3) y colores RGBA (..., N, 4) float32 de todos los segmentos en `time`"""
+        return (
+            self.positions(time, audio_amplitude, deformation_factor),
+            self.colors(time, audio_amplitude),
+        )
+
+    def positions(self, time, audio_amplitude, deformation_factor):
+        """Posiciones (N, 3) float32 de todos los segmentos en `time`
+
+        Con `audio_amplitude` de forma (B,) devuelve las de B esferas, con forma (B, N, 3).
+        """
+        t = time
+        amplitude = np.asarray(audio_amplitude, dtype=np.float64)
+
+        # Frecuencias muy bajas para movimientos ultra suaves
+        freq1 = 0.4 + amplitude * 0.5
+        freq2 = 0.5 + amplitude * 0.4
+        freq3 = 0.3 + amplitude * 0.6
+
+        # Las cuatro ondas a la vez: patrón de deformación ultra suave y orgánico
+        angles = np.stack(np.broadcast_arrays(t * freq1, t * freq2, t * freq3, t * 0.2))
+        cos_coefficient, sin_coefficient = wave_coefficients(angles, SPHERE_COSINE_WAVES)
+        phase_shape = (4,) + (1,) * amplitude.ndim + (-1,)
+        waves = cos_coefficient[..., None] * self.cos_phase.reshape(phase_shape)
+        waves += sin_coefficient[..., None] * self.sin_phase.reshape(phase_shape)
+
+        audio_multiplier = 1.0 + amplitude * 0.8
+        wave_scale = np.float32(0.15 * 0.05 * audio_multiplier * deformation_factor)
+        offset = np.float32(0.05 * audio_multiplier * deformation_factor)
+        deformation = waves[3] * wave_scale[..., None]
+        deformation += offset[..., None]
+        deformation *= waves[0]
+        deformation *= waves[1]
+        deformation *= waves[2]
+
+        # Deformación radial a lo largo de la dirección precalculada
+        positions = self.directions * deformation[..., None]
+        positions += self.original_vertices
+        return positions
+
+    def colors(self, time, audio_amplitude, rows=slice(None)):
+        """Colores RGBA float32 de los segmentos `rows` (todos por defecto) en `time`
+
+        Con `audio_amplitude` de forma (B,) devuelve los de B esferas, con forma (B, R, 4): las
+        ondas solo dependen del tiempo y se calculan una vez para todas.
+        """
+        return self.shade(self.color_waves(time, rows), audio_amplitude)
+
+    def color_waves(self, time, rows=slice(None)):
+        """Parte del color de los segmentos `rows` que solo depende del tiempo, (R, 4) float32
+
+        Cambia muy despacio, así que se puede recalcular por tramos y combinar cada frame
+        con la amplitud mediante `shade`.
+        """
+        t = time
+
+        # Variación de color extremadamente suave
+        angles = np.array([t * 0.08, t * 0.09, t * 0.07])
+        cos_coefficient, sin_coefficient = wave_coefficients(angles, SPHERE_COLOR_COSINE_WAVES)
+        waves = cos_coefficient[:, None] * self.cos_color_phase[:, rows]
+        waves += sin_coefficient[:, None] * self.sin_color_phase[:, rows]
+
+        colors = np.empty((waves.shape[1], 4), dtype=np.float32)
+        np.multiply(waves[0], 0.1, out=colors[:, 0])
+        np.multiply(waves[1], 0.04, out=colors[:, 1])
+        np.multiply(waves[2], 0.04, out=colors[:, 2])
+        colors[:, 3] = 1.0
+        return colors
+
+    def shade(self, waves, audio_amplitude):
+        """Colores RGBA a partir de `color_waves`, con el tono de la amplitud y el recorte"""
+        amplitude = np.asarray(audio_amplitude, dtype=np.float64)[..., None]
+        colors = np.empty(amplitude.shape[:-1] + waves.shape, dtype=np.float32)
+        colors[...] = waves
+        colors[..., 0] += np.float32(0.75 + amplitude * 0.05)
+        colors[..., 1:3] += np.float32(0.06 + amplitude * 0.02)[..., None]
+        np.clip(colors[..., 0], 0.7, 0.9, out=colors[..., 0])
+        np.clip(colors[..., 1:3], 0.0, 0.12, out=colors[..., 1:3])
+        return colors
+
+
+def deform_sphere(original_vertices, time, audio_amplitude, deformation_factor):
+    """Calcular en bloque las posiciones y colores RGBA de todos los segmentos de la esfera
+
+    `original_vertices` es un array (N, 3) con las posiciones de reposo. Devuelve dos
+    arrays float32 de forma (N, 3) y (N, 4), equivalentes a aplicar
+    `deform_sphere_scalar` a cada segmento. Para deformar cada frame conviene crear una
+    vez un `SphereDeformation` y reutilizar sus tablas.
+    """
+    return SphereDeformation(original_vertices).deform(time, audio_amplitude, deformation_factor)
+
+
+def deform_sphere_scalar(orig_pos, time, audio_amplitude, deformation_factor):
+    """Fórmula de referencia para un solo segmento, usada para validar `deform_sphere`"""
+    x, y, z = orig_pos
+    length = math.sqrt(x * x + y * y + z * z)
+    t = time
+
+    freq1 = 0.4 + audio_amplitude * 0.5
+    freq2 = 0.5 + audio_amplitude * 0.4
+    freq3 = 0.3 + audio_amplitude * 0.6
+
+    wave1 = math.sin(t * freq1 + x * 1.0)
+    wave2 = math.cos(t * freq2 + y * 1.2)
+    wave3 = math.sin(t * freq3 + z * 1.4)
+    wave4 = math.sin(t * 0.2 + length * 1.0)
+
+    base_deformation = 0.05 * wave1 * wave2 * wave3 * (1.0 + 0.15 * wave4)
+    audio_multiplier = 1.0 + audio_amplitude * 0.8
+    deformation = base_deformation * audio_multiplier * deformation_factor
+
+    if length > 0:
+        position = (
+            x + x / length * deformation,
+            y + y / length * deformation,
+            z + z / length * deformation,
+        )
+    else:
+        position = (x, y, z)
+
+    r = 0.75 + 0.1 * math.sin(t * 0.08 + x * 0.2) + audio_amplitude * 0.05
+    g = 0.06 + 0.04 * math.cos(t * 0.09 + y * 0.25) + audio_amplitude * 0.02
+    b = 0.06 + 0.04 * math.sin(t * 0.07 + z * 0.22) + audio_amplitude * 0.02
+    color = (
+        max(0.7, min(0.9, r)),
+        max(0.0, min(0.12, g)),
+        max(0.0, min(0.12, b)),
+        1.0,
+    )
+
+    return position, color
+
+
+class SatelliteDeformation:
+    """Tablas precalculadas de los segmentos de los satélites para deformarlos cada frame
+
+    Como en `SphereDeformation`, las fases espaciales de cada segmento se guardan como coseno
+    y seno; la fase temporal de cada satélite (que incluye su desplazamiento `+ i`) se calcula
+    una vez por satélite y frame, y se combina con las tablas por productos-suma.
+    """
+
+    def __init__(self, original_positions, num_satellites):
+        original_positions = np.asarray(original_positions, dtype=np.float64)
+        _, directions = unit_directions(original_positions)
+        x = original_positions[:, 0]
+        y = original_positions[:, 1]
+        z = original_positions[:, 2]
+
+        self.num_satellites = num_satellites
+        self.original_positions = original_positions.astype(np.float32)
+        self.directions = directions.astype(np.float32)
+
+        # Fases espaciales de las tres ondas y del color de cada segmento
+        phases = np.stack((x * 3.0, y * 3.5, z * 2.8))
+        self.cos_phase = np.cos(phases).astype(np.float32)[:, None, :]
+        self.sin_phase = np.sin(phases).astype(np.float32)[:, None, :]
+        segment_phase = np.arange(len(original_positions)) * 0.2
+        self.cos_segment = np.cos(segment_phase).astype(np.float32)
+        self.sin_segment = np.sin(segment_phase).astype(np.float32)
+
+        # Índice y color base de cada satélite
+        self.index = np.arange(num_satellites, dtype=np.float64)
+        self.base_colors = SATELLITE_BASE_COLORS[
+            np.arange(num_satellites) % len(SATELLITE_BASE_COLORS)
+        ]
+
+    def deform(self, time, audio_amplitude, deformation_factor, collision_time, satellites=None,
+               simulation_time=None):
+        """Posiciones (n * M, 3) y colores RGBA (n * M, 4) float32, satélite a satélite
+
+        Con `satellites` (índices) solo se calculan esos satélites, en ese orden.
+        `collision_time` se mide en el reloj de la física, que tras un frame muy lento se queda
+        por detrás de `time`: el brillo de cada colisión se calcula respecto a
+        `simulation_time` (por defecto `time`).
+        """
+        t = time
+        if simulation_time is None:
+            simulation_time = time
+        if satellites is None:
+            satellites = slice(None)
+        index = self.index[satellites]
+        collision_time = np.asarray(collision_time)[satellites]
+
+        # Deformación más pequeña y rápida para satélites pequeños. La fase temporal de cada
+        # satélite se calcula en float64, y solo su seno y coseno pasan a float32
+        angles = np.stack((
+            t * (1.2 + index * 0.3 + audio_amplitude * 0.8) + index,
+            t * (1.5 + index * 0.2 + audio_amplitude * 0.6) + index,
+            t * (0.9 + index * 0.4 + audio_amplitude * 1.0) + index,
+        ))
+        cos_coefficient, sin_coefficient = wave_coefficients(angles, SATELLITE_COSINE_WAVES)
+        waves = cos_coefficient[:, :, None] * self.cos_phase
+        waves += sin_coefficient[:, :, None] * self.sin_phase
+
+        audio_multiplier = 1.0 + audio_amplitude * 0.8
+        deformation = waves[0] * (0.02 * audio_multiplier * deformation_factor)
+        deformation *= waves[1]
+        deformation *= waves[2]
+
+        positions = self.directions * deformation[:, :, None]
+        positions += self.original_positions
+
+        # Variación de color con la música y brillo tras una colisión
+        c = t * 0.2
+        color_variation = (0.1 * audio_amplitude) * (
+            math.sin(c) * self.cos_segment + math.cos(c) * self.sin_segment
+        )
+        collision_intensity = np.maximum(0, 1.0 - (simulation_time - collision_time) * 4)
+        bright_factor = (1.0 + collision_intensity * 0.5).astype(np.float32)
+
+        # RGB en un array contiguo y una sola copia al buffer RGBA intercalado
+        rgb = self.base_colors[satellites][:, None, :] + color_variation[None, :, None]
+        rgb *= bright_factor[:, None, None]
+        np.clip(rgb, 0.1, 1.0, out=rgb)
+
+        colors = np.empty(rgb.shape[:2] + (4,), dtype=np.float32)
+        colors[:, :, :3] = rgb
+        colors[:, :, 3] = 0.95
+
+        return positions.reshape(-1, 3), colors.reshape(-1, 4)
+
+
+def deform_satellites(original_positions, num_satellites, time, audio_amplitude,
+                      deformation_factor, collision_time):
+    """Calcular en bloque las posiciones y colores RGBA de los segmentos de todos los satélites
+
+    `original_positions` es la disposición (M, 3) de segmentos que comparten todos los
+    satélites y `collision_time` el instante de la última colisión de cada uno. Devuelve
+    arrays float32 de forma (num_satellites * M, 3) y (num_satellites * M, 4), satélite a
+    satélite, equivalentes a aplicar `deform_satellite_scalar` a cada segmento. Para deformar
+    cada frame conviene crear una vez un `SatelliteDeformation` y reutilizar sus tablas.
+    """
+    return SatelliteDeformation(original_positions, num_satellites).deform(
+        time, audio_amplitude, deformation_factor, collision_time
+    )
+
+
+def deform_satellite_scalar(orig_pos, satellite, segment, time, audio_amplitude,
+                            deformation_factor, collision_time):
+    """Fórmula de referencia para un segmento de un satélite, usada para validar `deform_satellites`"""
+    x, y, z = orig_pos
+    length = math.sqrt(x * x + y * y + z * z)
+    t = time
+    i = satellite
+
+    sat_freq1 = 1.2 + i * 0.3 + audio_amplitude * 0.8
+    sat_freq2 = 1.5 + i * 0.2 + audio_amplitude * 0.6
+    sat_freq3 = 0.9 + i * 0.4 + audio_amplitude * 1.0
+
+    wave1 = math.sin(t * sat_freq1 + x * 3.0 + i)
+    wave2 = math.cos(t * sat_freq2 + y * 3.5 + i)
+    wave3 = math.sin(t * sat_freq3 + z * 2.8 + i)
+
+    base_deformation = 0.02 * wave1 * wave2 * wave3
+    sat_audio_multiplier = 1.0 + audio_amplitude * 0.8
+    deformation = base_deformation * sat_audio_multiplier * deformation_factor
+
+    if length > 0:
+        position = (
+            x + x / length * deformation,
+            y + y / length * deformation,
+            z + z / length * deformation,
+        )
+    else:
+        position = (x, y, z)
+
+    base_color = SATELLITE_BASE_COLORS[i % len(SATELLITE_BASE_COLORS)]
+    collision_intensity = max(0, 1.0 - (t - collision_time) * 4)
+    color_variation = 0.1 * math.sin(t * 0.2 + segment * 0.2) * audio_amplitude
+    bright_factor = 1.0 + collision_intensity * 0.5
+    color = tuple(
+        max(0.1, min(1.0, (float(channel) + color_variation) * bright_factor))
+        for channel in base_color
+    ) + (0.95,)
+
+    return position, color
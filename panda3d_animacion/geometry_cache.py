@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+from panda3d.core import BamFile, Filename, NodePath
+
+from panda3d_animacion.audio_cache import default_cache_directory
+from panda3d_animacion.mesh import layout_node, read_layout
+
+# Cambiar al modificar la generación de la geometría para invalidar las entradas antiguas
+GEOMETRY_VERSION = 1
+
+
+class GeometryCache:
+    """Caché en disco (.bam) de la geometría de reposo generada para la esfera y los satélites
+
+    Cada entrada guarda una copia de la disposición de tarjetas (posiciones, normales y
+    colores) con su orientación ya calculada, que es la parte cara de generar. La clave
+    combina la versión del generador con sus parámetros (segmentos, tamaño, radio), así que
+    cambiar cualquiera de ellos genera y guarda una entrada nueva.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_directory("geometry")
+        self.layouts = {}  # Disposiciones ya leídas en esta ejecución
+
+    def key(self, kind, **parameters):
+        """Clave de la geometría `kind` generada con `parameters`"""
+        values = "-".join(f"{name}{value:g}" for name, value in sorted(parameters.items()))
+        return f"{kind}-v{GEOMETRY_VERSION}-{values}"
+
+    def entry_path(self, key):
+        """Ruta del archivo de la entrada `key`"""
+        return os.path.join(self.directory, key + ".bam")
+
+    def load(self, key):
+        """Leer el GeomNode de la entrada `key`, o None si no está"""
+        entry = self.entry_path(key)
+        if not os.path.exists(entry):
+            return None
+        # Leído con BamFile y no con el Loader: con una GSG real, el Loader reempaqueta los
+        # vértices en el formato preferido de la tarjeta (colores en 8 bits, arrays intercalados)
+        bam = BamFile()
+        if not bam.open_read(Filename.from_os_specific(entry)):
+            return None
+        node = bam.read_node()
+        bam.close()
+        if node is None or node.is_geom_node():
+            return node
+        geom_node = NodePath(node).find("**/+GeomNode")
+        return None if geom_node.isEmpty() else geom_node.node()
+
+    def store(self, key, node):
+        """Guardar un GeomNode de forma atómica; un fallo solo significa regenerar la próxima vez"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".bam")
+            os.close(handle)
+            if NodePath(node).writeBamFile(Filename.from_os_specific(temporary)):
+                os.replace(temporary, self.entry_path(key))
+            else:
+                os.remove(temporary)
+        except OSError as e:
+            print(f"No se pudo guardar la geometría en la caché: {e}")
+
+    def layout(self, key, size, build):
+        """Centros, esquinas y colores de una disposición, desde la caché o generada y guardada
+
+        `build` devuelve los centros y los colores (o None) de las tarjetas. En ambos casos el
+        resultado se lee del GeomNode, así que es idéntico con y sin caché.
+        """
+        if key in self.layouts:
+            return self.layouts[key]
+        node = self.load(key)
+        if node is None:
+            centers, colors = build()
+            node = layout_node(key, centers, size, colors)
+            self.store(key, node)
+        self.layouts[key] = read_layout(node)
+        return self.layouts[key]
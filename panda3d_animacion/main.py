@@ -3,15 +3,130 @@ from panda3d.core import *
 from direct.task import Task
 from direct.gui.OnscreenText import OnscreenText
 from direct.gui.DirectGui import *
+import argparse
+import bisect
 import math
-import random
+import numpy as np
 import pygame
-import threading
 import os
 
+from panda3d_animacion.audio import (
+    MAX_SPHERE_BANDS,
+    AudioAnalysisWorker,
+    open_pcm_stream,
+    resample_bands,
+)
+from panda3d_animacion.audio_cache import AnalysisCache
+from panda3d_animacion.deformation import (
+    SATELLITE_BASE_COLORS,
+    SatelliteDeformation,
+    SphereDeformation,
+)
+from panda3d_animacion.geometry_cache import GeometryCache
+from panda3d_animacion.mesh import CardMesh
+from panda3d_animacion.playlist import TRACK_CHANGE_MARGIN, TrackPreparation
+from panda3d_animacion.profiling import DEFAULT_TIMINGS_PATH, FrameProfiler, StartupTimer
+from panda3d_animacion.quality import (
+    DEFAULT_QUALITY,
+    DEFAULT_RENDER_MODE,
+    MULTISAMPLES,
+    QUALITY_PRESETS,
+    RENDER_MODES,
+    QualityGovernor,
+    capped_frame_budget,
+    quality_ladder,
+    refresh_frame_budget,
+)
+from panda3d_animacion.replay import InputRecorder
+from panda3d_animacion.satellites import SPHERE_COLLISION_DISTANCE, SatelliteSystem
+from panda3d_animacion.scheduling import DEFAULT_SIMULATION_RATE, FixedTimestep, UpdateScheduler
+from panda3d_animacion.shadows import DEFAULT_SHADOW_ANGLE, DEFAULT_SHADOW_RATE, ShadowUpdatePolicy
+from panda3d_animacion.simulation_process import SimulationProcess
+from panda3d_animacion.startup import AudioStartup
+
+# Radio de la esfera principal (antes de escalarla) y de cada satélite
+SPHERE_RADIUS = 1.0
+SATELLITE_RADIUS = 0.4  # Radio muy pequeño para la esfera satélite
+SPHERE_SCALE = 3.0
+
+# Con una esfera por banda de frecuencia, radio del anillo horizontal en que se colocan
+BAND_RING_RADIUS = 6.0
+# Radio de una esfera deformada respecto al de reposo, como máximo
+DEFORMED_RADIUS = 1.15
+
+# Niveles de detalle: radio máximo de la cámara para usar cada nivel (el último no tiene límite)
+LOD_DISTANCES = (25.0, 38.0)
+# Fracción de los anillos de la esfera y de los segmentos por satélite en cada nivel
+SPHERE_LOD_FRACTIONS = (1.0, 2 / 3, 1 / 2)
+SATELLITE_LOD_FRACTIONS = (1.0, 5 / 8, 3 / 8)
+
+# Atributo de transparencia de cada modo de dibujo
+TRANSPARENCY_MODES = {
+    "opaque": TransparencyAttrib.M_none,
+    "coverage": TransparencyAttrib.M_multisample,
+    "alpha": TransparencyAttrib.M_alpha,
+}
+
+def band_layout(count):
+    """Centro de cada esfera y escala común: una en el centro, o `count` en un anillo"""
+    if count == 1:
+        return np.array([[0.0, 0.0, 2.0]]), SPHERE_SCALE
+    angles = 2 * np.pi * np.arange(count) / count
+    positions = np.column_stack((
+        np.sin(angles) * BAND_RING_RADIUS,
+        -np.cos(angles) * BAND_RING_RADIUS,
+        np.full(count, 2.0),
+    ))
+    # Cuantas más esferas, más pequeñas, para que las vecinas no se toquen
+    scale = min(SPHERE_SCALE, BAND_RING_RADIUS * math.sin(math.pi / count) / DEFORMED_RADIUS)
+    return positions, scale
+
+
 class OrganicSphere(ShowBase):
-    def __init__(self):
-        ShowBase.__init__(self)
+    def __init__(self, segments=30, num_satellites=10, audio=True, timings_path=None, seed=None,
+                 satellite_segments=16, shadow_size=2048, frame_budget=None, playlist=None,
+                 shuffle=False, shadow_angle=DEFAULT_SHADOW_ANGLE, shadow_rate=DEFAULT_SHADOW_RATE,
+                 render_mode=DEFAULT_RENDER_MODE, simulation_rate=DEFAULT_SIMULATION_RATE,
+                 simulation_process=False, sphere_bands=1):
+        # Desglose del arranque; la cadena de audio (mixer, pista, análisis) empieza antes
+        # que la ventana y corre en segundo plano mientras se construye la escena
+        self.startup_timer = StartupTimer()
+        self.analysis_cache = AnalysisCache()  # Envolventes ya analizadas en disco
+        self.audio_startup = None
+        if audio:
+            # Sin lista indicada, se reproducen los MP3 del directorio del proyecto
+            self.audio_startup = AudioStartup(
+                playlist or os.path.dirname(os.path.dirname(__file__)),
+                self.analysis_cache,
+                self.startup_timer,
+                shuffle=shuffle
+            )
+            self.audio_startup.start()
+        
+        # Modo de dibujo de los segmentos; alpha-to-coverage necesita pedir un framebuffer
+        # multisample antes de abrir la ventana
+        self.render_mode = render_mode
+        if render_mode == "coverage":
+            loadPrcFileData("render-mode", f"framebuffer-multisample 1\nmultisamples {MULTISAMPLES}")
+        
+        with self.startup_timer.phase("ventana"):
+            ShowBase.__init__(self)
+        
+        # Densidad de la esfera y de los satélites, número de satélites y resolución de sombras
+        # (los fijan los presets de calidad y los benchmarks)
+        self.segments = segments
+        self.num_satellites = num_satellites
+        self.satellite_segments = satellite_segments
+        self.sphere_bands = sphere_bands  # Esferas, una por banda de frecuencia
+        self.shadow_size = shadow_size
+        self.detail_bias = 0  # Niveles de detalle que se bajan además de los que pide el zoom
+        
+        # El mapa de sombras solo se vuelve a renderizar cuando la luz ha girado lo suficiente
+        # o a un ritmo fijo; entre refrescos se reutiliza el último
+        self.shadow_policy = ShadowUpdatePolicy(shadow_angle, shadow_rate)
+        
+        # Semilla de la simulación de satélites (fija en el render offline para que sea reproducible)
+        self.seed = seed
         
         # Configurar la ventana
         self.setBackgroundColor(0.1, 0.1, 0.1)
@@ -19,19 +134,15 @@ class OrganicSphere(ShowBase):
         # Crear un plano de tierra para recibir la sombra
         # self.create_ground_plane()
         
-        # Crear una esfera usando el modelo built-in de Panda3D
-        self.sphere = self.loader.loadModel("models/environment")
-        if self.sphere.isEmpty():
-            self.sphere = self.create_basic_sphere()
-        else:
-            self.sphere.clearModelNodes()
+        # Crear la esfera con geometría procedural, leída de la caché de geometría si ya se
+        # generó con los mismos parámetros en un arranque anterior
+        self.geometry_cache = GeometryCache()
+        with self.startup_timer.phase("esfera"):
             self.sphere = self.create_basic_sphere()
         
-        self.sphere.reparentTo(self.render)
-        self.sphere.setScale(3)
-        self.sphere.setPos(0, 0, 2) # Elevar la esfera para que la sombra sea visible
-        
-        # Configurar la cámara
+        # Configurar la cámara (sin ventana, window-type none, ShowBase no crea ninguna)
+        if self.camera is None:
+            self.camera = self.render.attachNewNode("camera")
         self.camera.set_pos(0, -15, 5)
         self.camera.look_at(0, 0, 2)
         self.disable_mouse()
@@ -46,6 +157,24 @@ class OrganicSphere(ShowBase):
         self.audio_amplitude = 0.0
         self.audio_playing = False
         self.music_file = None
+        self.audio_envelope = None  # Envolvente precalculada de la pista cargada
+        self.audio_analyzer = None  # Hilo de análisis en vivo de la pista
+        self.audio_bands = None  # Energía por banda de frecuencia en el frame actual
+        self.band_amplitudes = np.zeros(self.sphere_bands)  # Amplitud de cada esfera
+        self.audio_onset = False  # Onset detectado en el frame actual
+        self.audio_beat = False  # Beat (onset en graves) detectado en el frame actual
+        self.playback_position = 0.0  # Segundos reproducidos, leídos por el hilo de análisis
+        self.replayed_amplitude = None  # Amplitud del frame leída de un registro de entradas
+        self.music_paused = False
+        
+        # Lista de reproducción: la pista siguiente se prepara en segundo plano y se encola
+        # en el mixer para que el cambio de pista no corte el audio ni el render
+        self.playlist = None
+        self.next_track = None  # TrackPreparation de la pista siguiente (o de la pedida con N/B)
+        self.next_step = 1  # Posición de esa pista respecto a la actual
+        self.next_queued = False  # Ya encolada en el mixer
+        self.track_skip = False  # Cambio de pista pedido a la espera de que el archivo esté leído
+        self.track_position = 0.0  # Posición del mixer en el frame anterior
         self.volume = 0.7  # Volumen inicial (70%)
         self.deformation_factor = 1.0  # Factor de amplitud de deformación (100%)
         
@@ -113,31 +242,69 @@ class OrganicSphere(ShowBase):
         self.update_camera()
         
         # Configurar iluminación con sombras
-        self.setup_lighting()
+        with self.startup_timer.phase("iluminación"):
+            self.setup_lighting()
         
         # Variables para la animación
         self.time = 0.0
-        self.original_vertices = []
+        self.original_vertices = np.empty((0, 3), dtype=np.float32)
+        self.update_scheduler = UpdateScheduler()  # Reparto de los canales lentos entre frames
+        
+        # La física de satélites avanza a paso fijo, independiente de la duración del frame
+        self.simulation_rate = simulation_rate
+        self.simulation_clock = FixedTimestep(simulation_rate)
+        self.simulation_time = 0.0
+        
+        # Proceso de simulación opcional; mientras no arranca, todo se calcula en este hilo
+        self.simulation_worker = None
+        self.simulation_frame = None  # Ranura del último frame recogido del proceso
         
         # Variables para satélites
         self.satellites = []
-        self.satellite_orbits = []
-        self.num_satellites = 10
-        
-        # Inicializar pygame mixer para audio
-        pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=1024)
-        pygame.mixer.init()
         
-        # Buscar archivo MP3 en el directorio del proyecto
-        self.find_and_load_music()
+        # Amplitud simulada hasta que el audio esté listo (o siempre, sin mixer en modo headless)
+        if self.audio_startup is None:
+            self.simulate_audio_data()
+        else:
+            self.audio_playing = True
         
         # Crear satélites orbitales
-        self.create_satellites()
+        with self.startup_timer.phase("satélites"):
+            self.create_satellites()
         
-        self.store_original_vertices()
+        # Activar el nivel de detalle que corresponde a la cámara inicial
+        with self.startup_timer.phase("deformación"):
+            self.store_original_vertices()
+            self.detail_level = None
+            self.update_detail_level()
+        
+        # Gobernador de calidad: baja o sube sombras, teselación y satélites para mantener
+        # el presupuesto de tiempo por frame (en milisegundos)
+        self.quality_ladder = quality_ladder(self.shadow_size, self.num_satellites)
+        self.quality_level = 0
+        self.quality_governor = None
+        if frame_budget:
+            self.quality_governor = QualityGovernor(frame_budget, len(self.quality_ladder))
+        
+        if simulation_process:
+            self.start_simulation_process()
         
         self.taskMgr.add(self.animate_sphere, "animate_sphere")
         
+        # Hitos del arranque: el primer frame dibujado (tarea tras igLoop) y el audio listo
+        self.taskMgr.add(self.mark_first_frame, "mark_first_frame", sort=60)
+        if self.audio_startup is not None:
+            self.taskMgr.add(self.poll_audio_startup, "poll_audio_startup")
+        
+        # Medición de tiempos por fase (PStats y grabación a archivo); sin coste si está apagada
+        self.profiler = FrameProfiler(self)
+        self.timings_path = timings_path or DEFAULT_TIMINGS_PATH
+        if timings_path:
+            self.profiler.enable(timings_path)
+        
+        # Grabación opcional de las entradas de cada frame para reproducirlas después
+        self.input_recorder = None
+        
         # Añadir controles de cámara
         self.accept("arrow_left", self.spin_camera_left)
         self.accept("arrow_right", self.spin_camera_right)
@@ -150,6 +317,11 @@ class OrganicSphere(ShowBase):
         self.accept("space", self.toggle_music)
         self.accept("p", self.toggle_music)
         self.accept("r", self.restart_music)
+        self.accept("n", self.skip_track, [1])
+        self.accept("b", self.skip_track, [-1])
+        
+        # Activar o desactivar la grabación de tiempos por frame
+        self.accept("t", self.toggle_timings)
         
         print("Animación iniciada con sincronización de audio.")
         print("Controles:")
@@ -157,10 +329,10 @@ class OrganicSphere(ShowBase):
         print("- Flechas arriba/abajo o W/S: zoom in/out")
         print("- ESPACIO o P: play/pausa de la música")
         print("- R: reiniciar música desde el principio")
+        print("- N/B: pista siguiente/anterior de la lista")
+        print("- T: grabar/detener los tiempos por frame")
         print("- La esfera se deforma al ritmo de la música")
-        if self.music_file:
-            print(f"- Reproduciendo: {os.path.basename(self.music_file)}")
-        else:
+        if self.audio_startup is None:
             print("- Usando simulación de audio (coloca un archivo .mp3 en el directorio para música real)")
     
     def create_ground_plane(self):
@@ -172,12 +344,11 @@ class OrganicSphere(ShowBase):
         ground.setHpr(0, -90, 0)
         ground.setColor(0.2, 0.2, 0.25, 1)
 
-    def create_basic_sphere(self):
-        """Crear una esfera densa sin separaciones visibles"""
-        sphere = self.render.attachNewNode("sphere")
-        segments = 30  # Más segmentos para mayor densidad
-        
-        # Crear segmentos de la esfera con alta densidad
+    def sphere_layout(self, segments):
+        """Centros y colores de los segmentos de una esfera con `segments` anillos"""
+        radius = SPHERE_RADIUS
+        centers = []
+        colors = []
         for i in range(segments):
             phi = math.pi * i / (segments - 1)
             for j in range(segments * 2):
@@ -187,79 +358,292 @@ class OrganicSphere(ShowBase):
                 x = math.sin(phi) * math.cos(theta)
                 y = math.sin(phi) * math.sin(theta)
                 z = math.cos(phi)
-                
-                # Crear segmentos más grandes que se superpongan ligeramente
-                cm = CardMaker(f"segment_{i}_{j}")
-                size = 0.100 # Tamaño más grande para cubrir huecos
-                cm.setFrame(-size, size, -size, size)
-                card = sphere.attachNewNode(cm.generate())
-                
-                # Posicionar el segmento
-                radius = 1.0
-                card.setPos(x * radius, y * radius, z * radius)
-                card.lookAt(0, 0, 0)
+                centers.append((x * radius, y * radius, z * radius))
                 
                 # Añadir color rojo con variación suave
                 r = 0.8 + 0.2 * (x + 1) / 2  # Rojo muy dominante
                 g = 0.05 + 0.1 * (y + 1) / 2  # Verde muy mínimo
                 b = 0.05 + 0.1 * (z + 1) / 2  # Azul muy mínimo
-                card.setColor(r, g, b, 1.0)
-                
-                # NO aplicar material que sobrescribe el color
-                # En su lugar, configurar propiedades de renderizado
-                card.setRenderModeWireframe()
-                card.setRenderModeFilled()
-                
-                # Hacer que los segmentos se mezclen mejor
-                card.setTransparency(TransparencyAttrib.MAlpha)
-                card.setAlphaScale(0.95)  # Ligeramente transparente para mezcla
-        
-        return sphere
+                colors.append((r, g, b, 1.0))
+        return centers, colors
     
-    def find_and_load_music(self):
-        """Buscar y cargar un archivo MP3 en el directorio del proyecto"""
-        project_dir = os.path.dirname(os.path.dirname(__file__))
+    def create_basic_sphere(self):
+        """Crear una esfera densa sin separaciones visibles, con un nivel de detalle por distancia"""
+        sphere = self.render.attachNewNode("sphere")
         
-        # Buscar archivos MP3 en el directorio del proyecto
-        mp3_files = []
-        for file in os.listdir(project_dir):
-            if file.lower().endswith('.mp3'):
-                mp3_files.append(os.path.join(project_dir, file))
+        # Una esfera por banda de frecuencia (una sola por defecto), cada una en su nodo;
+        # elevadas para que la sombra sea visible
+        positions, scale = band_layout(self.sphere_bands)
+        self.sphere_instances = []
+        for band, (x, y, z) in enumerate(positions.tolist()):
+            instance = sphere.attachNewNode(f"sphere_band{band}")
+            instance.setPos(x, y, z)
+            instance.setScale(scale)
+            self.sphere_instances.append(instance)
         
-        if mp3_files:
-            self.music_file = mp3_files[0]  # Usar el primer MP3 encontrado
-            print(f"Archivo de música encontrado: {os.path.basename(self.music_file)}")
-            self.load_and_play_music()
-        else:
-            print("No se encontró ningún archivo MP3 en el directorio del proyecto.")
-            print("Coloca un archivo .mp3 en el directorio raíz para sincronizar con música.")
-            # Usar simulación de audio sin archivo
-            self.simulate_audio_data()
+        # Cada nivel tiene su propia teselación; solo el activo está en la escena y se deforma
+        self.sphere_levels = []
+        for level, fraction in enumerate(SPHERE_LOD_FRACTIONS):
+            # Las esferas del anillo, más pequeñas, se teselan en proporción a su tamaño para
+            # que sus segmentos midan en pantalla lo mismo que los de la esfera única
+            segments = max(3, round(self.segments * fraction * scale / SPHERE_SCALE))
+            # Tamaño más grande para cubrir huecos (0.1 con 30 segmentos, escalado con la densidad)
+            size = 0.100 * 30 / segments
+            key = self.geometry_cache.key(
+                "sphere", segments=segments, size=size, radius=SPHERE_RADIUS
+            )
+            centers, corners, colors = self.geometry_cache.layout(
+                key, size, lambda segments=segments: self.sphere_layout(segments)
+            )
+            
+            # Todos los segmentos del nivel, de todas las esferas, comparten un único vertex
+            # buffer dinámico que se escribe de una vez; cada esfera dibuja su tramo
+            mesh = CardMesh(
+                f"sphere_lod{level}",
+                centers,
+                size,
+                np.tile(colors, (self.sphere_bands, 1)),
+                copies=self.sphere_bands,
+                corners=corners
+            )
+            nodes = []
+            for band, instance in enumerate(self.sphere_instances):
+                node = instance.attachNewNode(
+                    mesh.make_node(
+                        f"sphere_lod{level}",
+                        bounds_radius=1.5,
+                        start=band * len(centers),
+                        count=len(centers)
+                    )
+                )
+                node.stash()
+                nodes.append(node)
+            self.sphere_levels.append((mesh, nodes))
+        self.sphere_mesh = self.sphere_levels[0][0]
+        
+        # En modo opaco la esfera va al bin opaco y no se ordena; los otros modos conservan
+        # la ligera transparencia para que los segmentos se mezclen
+        sphere.setTransparency(TRANSPARENCY_MODES[self.render_mode])
+        if self.render_mode != "opaque":
+            sphere.setAlphaScale(0.95)  # Ligeramente transparente para mezcla
+        
+        return sphere
     
-    def load_and_play_music(self):
-        """Cargar y reproducir el archivo de música"""
-        try:
-            pygame.mixer.music.load(self.music_file)
+    def poll_audio_startup(self, task):
+        """Esperar sin bloquear a que el hilo de arranque deje el audio preparado"""
+        if not self.audio_startup.ready.is_set():
+            return Task.cont
+        self.finish_audio_startup()
+        return Task.done
+    
+    def finish_audio_startup(self):
+        """Arrancar la reproducción con la pista que dejó preparada el hilo de arranque"""
+        startup = self.audio_startup
+        if startup.error is not None:
+            print(f"Error al cargar el archivo de música: {startup.error}")
+            self.simulate_audio_data()
+        elif startup.music_file is None:
+            print(f"No se encontró ninguna pista en {startup.source}.")
+            print("Coloca un archivo .mp3 en el directorio raíz (o usa --playlist) para sincronizar con música.")
+            self.simulate_audio_data()
+        else:
+            self.music_file = startup.music_file
+            self.playlist = startup.playlist
+            print(f"Pistas en la lista de reproducción: {len(self.playlist)}")
+            print(f"Reproduciendo: {os.path.basename(self.music_file)}")
+            
+            # Si la pista ya se analizó en un arranque anterior, la envolvente se abre al instante;
+            # si no, el análisis en vivo cubre la espera hasta que termine el completo
+            self.audio_envelope = startup.envelope
+            if self.audio_envelope is None:
+                print("Analizando la pista en segundo plano.")
+                self.start_audio_analysis()
+                self.taskMgr.add(self.adopt_background_analysis, "adopt_background_analysis")
+            else:
+                print("Análisis de audio cargado desde la caché.")
+            
             pygame.mixer.music.set_volume(self.volume)  # Configurar volumen inicial
-            pygame.mixer.music.play(-1)  # Reproducir en bucle
-            self.audio_playing = True
+            pygame.mixer.music.play()  # Las pistas siguientes se encolan (con una sola, en bucle)
             print("Música iniciada. La esfera se sincronizará con el audio.")
-        except pygame.error as e:
-            print(f"Error al cargar el archivo de música: {e}")
-            self.simulate_audio_data()
+            
+            self.prepare_track(1)
+            self.taskMgr.add(self.update_playlist, "update_playlist", sort=-1)
+        
+        self.startup_timer.mark("audio listo")
+        self.report_startup()
+    
+    def adopt_background_analysis(self, task):
+        """Pasar a la envolvente del análisis completo de la primera pista en cuanto esté guardada"""
+        startup = self.audio_startup
+        if self.analysis_cache.analyzing(startup.analysis_key):
+            return Task.cont
+        if self.music_file == startup.music_file and self.audio_envelope is None:
+            envelope = self.analysis_cache.load(startup.analysis_key, pygame.mixer.get_init()[0])
+            if envelope is not None:
+                self.stop_audio_analysis()
+                self.audio_envelope = envelope
+                print("Análisis de audio completo: se detiene el análisis en vivo.")
+        return Task.done
+    
+    def mark_first_frame(self, task):
+        """Anotar el primer frame dibujado"""
+        self.startup_timer.mark("primer frame")
+        self.report_startup()
+        return Task.done
+    
+    def report_startup(self):
+        """Mostrar el desglose del arranque cuando se han alcanzado todos sus hitos"""
+        milestones = self.startup_timer.milestones
+        if "primer frame" in milestones and (
+            self.audio_startup is None or "audio listo" in milestones
+        ):
+            self.startup_timer.report()
+    
+    def prepare_track(self, step):
+        """Preparar en segundo plano la pista situada `step` posiciones después de la actual"""
+        self.next_step = step
+        self.next_queued = False
+        path = self.playlist.peek(step)
+        if path == self.music_file and self.audio_envelope is not None:
+            # La misma pista otra vez (lista de una sola), ya analizada: ni se relee ni se analiza.
+            # Sin envolvente, la preparación la toma de la caché en cuanto la guarde el análisis
+            # en segundo plano, en vez de reiniciar el análisis en vivo en cada vuelta
+            self.next_track = TrackPreparation.reuse(path, self.audio_envelope)
+            return
+        self.next_track = TrackPreparation(path, self.analysis_cache, pygame.mixer.get_init()[0])
+        self.next_track.start()
+    
+    def update_playlist(self, task):
+        """Encolar la pista siguiente en cuanto esté leída y detectar el cambio de pista"""
+        track = self.next_track
+        if track.analyzed.is_set() and not track.readable.is_set():
+            return self.discard_next_track(track.error)
+        
+        if self.track_skip:
+            # Cambio pedido con N/B (o pista terminada antes de tener la siguiente lista)
+            if track.readable.is_set():
+                try:
+                    pygame.mixer.music.load(track.path)
+                except pygame.error as e:
+                    return self.discard_next_track(e)
+                pygame.mixer.music.play()
+                self.music_paused = False
+                self.start_prepared_track()
+            return Task.cont
+        
+        if not self.next_queued and track.readable.is_set():
+            # El archivo ya está en la caché del sistema, así que encolarlo no espera al disco
+            try:
+                pygame.mixer.music.queue(track.path)
+            except pygame.error as e:
+                return self.discard_next_track(e)
+            self.next_queued = True
+        
+        # Al pasar a la pista encolada, el mixer vuelve a contar la posición desde cero
+        position = pygame.mixer.music.get_pos() / 1000.0
+        if self.next_queued and position + TRACK_CHANGE_MARGIN < self.track_position:
+            self.start_prepared_track()
+        elif not pygame.mixer.music.get_busy() and not self.music_paused:
+            self.track_skip = True
+        self.track_position = position
+        return Task.cont
+    
+    def discard_next_track(self, error):
+        """Quitar de la lista la pista preparada que no se puede reproducir y preparar la que ocupa su lugar"""
+        print(f"No se pudo leer {os.path.basename(self.next_track.path)}: {error}")
+        if len(self.playlist) == 1:
+            return Task.done
+        self.playlist.discard(self.next_step)
+        self.prepare_track(self.next_step)
+        return Task.cont
+    
+    def start_prepared_track(self):
+        """Pasar a la pista preparada, con su envolvente (o análisis en vivo), y preparar la siguiente"""
+        track = self.next_track
+        self.playlist.advance(self.next_step)
+        self.music_file = track.path
+        self.track_skip = False
+        self.track_position = 0.0
+        
+        self.stop_audio_analysis()
+        self.audio_envelope = track.envelope
+        if self.audio_envelope is None:
+            self.start_audio_analysis()
+        print(f"Reproduciendo: {os.path.basename(self.music_file)}")
+        self.prepare_track(1)
+    
+    def skip_track(self, step):
+        """Saltar a la pista siguiente (1) o anterior (-1) de la lista"""
+        if self.playlist is None:
+            print("No hay lista de reproducción cargada")
+            return
+        if step != self.next_step:
+            self.prepare_track(step)
+        self.track_skip = True
+    
+    def start_audio_analysis(self):
+        """Arrancar (o reiniciar) el hilo que analiza la pista al ritmo de la reproducción"""
+        self.stop_audio_analysis()
+        chunks, sample_rate = open_pcm_stream(self.music_file)
+        self.audio_analyzer = AudioAnalysisWorker(
+            chunks,
+            sample_rate,
+            position=lambda: self.playback_position
+        )
+        self.audio_analyzer.start()
+    
+    def stop_audio_analysis(self):
+        """Detener el hilo de análisis en vivo si está en marcha"""
+        if self.audio_analyzer is not None:
+            # Sin esperar al hilo: puede estar decodificando y el render no debe bloquearse
+            self.audio_analyzer.stop(wait=False)
+            self.audio_analyzer = None
+        self.playback_position = 0.0
     
     def simulate_audio_data(self):
         """Simular datos de audio cuando no hay archivo MP3"""
         print("Simulando datos de audio para la demostración.")
         self.audio_playing = True
     
+    def get_band_amplitudes(self):
+        """Amplitud de cada esfera: la energía de su banda de frecuencia (la global con una sola)"""
+        if self.sphere_bands == 1:
+            return np.array([self.audio_amplitude])
+        if self.audio_bands is not None:
+            return resample_bands(self.audio_bands, self.sphere_bands)
+        # Sin análisis por bandas (audio simulado): la amplitud global con un pulso por banda
+        phases = self.time * (1.0 + 0.37 * np.arange(self.sphere_bands))
+        return self.audio_amplitude * (0.6 + 0.4 * np.abs(np.sin(phases)))
+    
     def get_audio_amplitude(self):
         """Obtener la amplitud actual del audio"""
+        if self.replayed_amplitude is not None:
+            # Reproducción de un registro: la amplitud grabada en este frame
+            return self.replayed_amplitude
+        
         if self.music_file and pygame.mixer.music.get_busy():
-            # Simular análisis de amplitud basado en el tiempo
-            # En una implementación real, aquí analizarías el espectro de frecuencias
+            seconds = max(0, pygame.mixer.music.get_pos()) / 1000.0
+            self.playback_position = seconds
+            
+            if self.audio_envelope is not None:
+                # Búsqueda O(1) en la envolvente según la posición de reproducción
+                self.audio_bands = self.audio_envelope.bands_at(seconds)
+                return self.audio_envelope.amplitude_at(seconds)
+            
+            if self.audio_analyzer is not None:
+                # Lectura sin bloqueo del último análisis publicado por el hilo
+                analysis = self.audio_analyzer.read(seconds)
+                if analysis is not None:
+                    amplitude, self.audio_bands, self.audio_onset, self.audio_beat = analysis
+                    return amplitude
+            
+            # Sin envolvente, simular la amplitud basándose en el tiempo
             base_amplitude = 0.3 + 0.7 * abs(math.sin(self.time * 4)) * abs(math.cos(self.time * 2.5))
             return base_amplitude
+        elif self.audio_envelope is not None:
+            # Render offline: la envolvente se recorre con el tiempo de la animación, sin mixer
+            self.audio_bands = self.audio_envelope.bands_at(self.time)
+            return self.audio_envelope.amplitude_at(self.time)
         else:
             # Simulación de audio con patrones rítmicos
             beat_pattern = (
@@ -274,15 +658,16 @@ class OrganicSphere(ShowBase):
         # Activar el generador automático de shaders
         self.render.set_shader_auto()
         
-        # Configurar el título de la ventana
-        props = WindowProperties()
-        props.setTitle('Visualización de Audio - Panda3D')
-        self.win.requestProperties(props)
+        # Configurar el título de la ventana (no aplica a buffers offscreen)
+        if isinstance(self.win, GraphicsWindow):
+            props = WindowProperties()
+            props.setTitle('Visualización de Audio - Panda3D')
+            self.win.requestProperties(props)
         
         # Luz direccional principal que proyecta sombras
         dlight = DirectionalLight('dlight')
         dlight.set_color((0.9, 0.9, 0.8, 1))
-        dlight.set_shadow_caster(True, 2048, 2048)
+        dlight.set_shadow_caster(True, self.shadow_size, self.shadow_size)
         
         # Configurar los parámetros de la lente de sombras
         lens = dlight.get_lens()
@@ -311,307 +696,401 @@ class OrganicSphere(ShowBase):
         # Configurar antialiasing
         self.render.set_antialias(AntialiasAttrib.M_auto)
     
+    def satellite_layout(self, segments_per_satellite):
+        """Disposición (M, 3) de los segmentos de una esfera satélite"""
+        radius = SATELLITE_RADIUS
+        
+        layout = []
+        for j in range(segments_per_satellite):
+            for k in range(segments_per_satellite):
+                # Posición esférica para el segmento
+                phi = (j / segments_per_satellite) * 2 * math.pi
+                theta = (k / segments_per_satellite) * math.pi
+                
+                x = radius * math.sin(theta) * math.cos(phi)
+                y = radius * math.sin(theta) * math.sin(phi)
+                z = radius * math.cos(theta)
+                layout.append((x, y, z))
+        return np.array(layout, dtype=np.float32)
+    
     def create_satellites(self):
         """Crear satélites esféricos que orbiten alrededor de la esfera principal"""
+        self.build_satellite_levels()
+        
+        # Estado de movimiento (posición, velocidad, colisiones) de todos los satélites, que
+        # rebotan en cada esfera con una distancia de colisión proporcional a su tamaño
+        positions, scale = band_layout(self.sphere_bands)
+        distances = np.full(len(positions), SPHERE_COLLISION_DISTANCE * scale / SPHERE_SCALE)
+        self.satellite_system = SatelliteSystem(
+            self.num_satellites,
+            rng=np.random.default_rng(self.seed),
+            spheres=(positions, distances)
+        )
+    
+    def build_satellite_levels(self):
+        """Crear el nodo de cada satélite y sus mallas para cada nivel de detalle"""
+        # Cada satélite conserva su propio nodo para la posición y rotación
         for i in range(self.num_satellites):
-            # Crear una esfera pequeña para cada satélite
             satellite_sphere = self.render.attachNewNode("satellite_sphere")
+            satellite_sphere.setTransparency(TRANSPARENCY_MODES[self.render_mode])
+            self.satellites.append(satellite_sphere)
+        
+        # Un nivel de detalle por distancia, de máxima densidad (16×16 segmentos en calidad
+        # alta) a mínima
+        self.satellite_levels = []
+        for level, fraction in enumerate(SATELLITE_LOD_FRACTIONS):
+            segments_per_satellite = max(3, round(self.satellite_segments * fraction))
+            segment_size = 0.080 * 16 / segments_per_satellite  # Ultra pequeño con 16 segmentos
             
-            # Crear segmentos para la esfera satélite (máxima densidad posible)
-            segments_per_satellite = 16  # Máxima densidad de segmentos
-            segment_size = 0.080  # Tamaño ultra pequeño para densidad extrema
-            
-            satellite_segments = []
-            for j in range(segments_per_satellite):
-                for k in range(segments_per_satellite):
-                    # Crear cada segmento de la esfera satélite
-                    segment_maker = CardMaker(f"satellite_segment_{i}_{j}_{k}")
-                    segment_maker.setFrame(-segment_size, segment_size, -segment_size, segment_size)
-                    segment_node = satellite_sphere.attachNewNode(segment_maker.generate())
-                    
-                    # Posición esférica para el segmento
-                    phi = (j / segments_per_satellite) * 2 * math.pi
-                    theta = (k / segments_per_satellite) * math.pi
-                    
-                    radius = 0.4  # Radio muy pequeño para la esfera satélite
-                    x = radius * math.sin(theta) * math.cos(phi)
-                    y = radius * math.sin(theta) * math.sin(phi)
-                    z = radius * math.cos(theta)
-                    
-                    segment_node.setPos(x, y, z)
-                    segment_node.lookAt(0, 0, 0)  # Orientar hacia el centro
-                    
-                    satellite_segments.append(segment_node)
+            # Disposición de segmentos compartida por todos los satélites
+            key = self.geometry_cache.key(
+                "satellite",
+                segments=segments_per_satellite,
+                size=segment_size,
+                radius=SATELLITE_RADIUS
+            )
+            layout, corners, _ = self.geometry_cache.layout(
+                key,
+                segment_size,
+                lambda segments=segments_per_satellite: (self.satellite_layout(segments), None)
+            )
             
             # Color rojo como la esfera principal, con ligeras variaciones
-            red_variations = [
-                (0.9, 0.1, 0.1, 0.9),  # Rojo intenso
-                (0.8, 0.15, 0.05, 0.9),  # Rojo con toque naranja
-                (0.85, 0.05, 0.15, 0.9),  # Rojo con toque magenta
-                (0.95, 0.08, 0.08, 0.9),  # Rojo muy puro
-            ]
-            satellite_sphere.setColor(*red_variations[i % len(red_variations)])
-            satellite_sphere.setTransparency(TransparencyAttrib.MAlpha)
-            
-            # Configurar movimiento aleatorio inicial
-            import random
-            orbit_info = {
-                'x': random.uniform(-10, 10),  # Posición inicial X aleatoria
-                'y': random.uniform(-10, 10),  # Posición inicial Y aleatoria
-                'z': random.uniform(-2, 6),    # Posición inicial Z aleatoria
-                'vel_x': random.uniform(-2, 2),  # Velocidad X aleatoria
-                'vel_y': random.uniform(-2, 2),  # Velocidad Y aleatoria
-                'vel_z': random.uniform(-1, 1),  # Velocidad Z aleatoria
-                'bounce_factor': 0.8,  # Factor de rebote al chocar
-                'collision_distance': 3.5,  # Distancia para colisión con esfera principal
-                'collision_time': 0.0,  # Tiempo desde última colisión
-                'random_factor': random.uniform(0.5, 1.5),  # Factor de aleatoriedad individual
-                'segments': satellite_segments,  # Almacenar segmentos para deformación
-                'original_positions': []  # Posiciones originales de los segmentos
-            }
+            num_segments = len(layout)
+            base_colors = np.empty((self.num_satellites, num_segments, 4), dtype=np.float32)
+            base_colors[:, :, :3] = SATELLITE_BASE_COLORS[
+                np.arange(self.num_satellites) % len(SATELLITE_BASE_COLORS)
+            ][:, None, :]
+            base_colors[:, :, 3] = 0.9
             
-            # Almacenar posiciones originales de los segmentos del satélite
-            for segment in satellite_segments:
-                orbit_info['original_positions'].append(segment.getPos())
+            # Los segmentos de todos los satélites viven en un único vertex buffer que se
+            # actualiza con una sola escritura por frame; cada satélite dibuja su tramo
+            mesh = CardMesh(
+                f"satellites_lod{level}",
+                layout,
+                segment_size,
+                base_colors.reshape(-1, 4),
+                copies=self.num_satellites,
+                corners=corners
+            )
             
-            self.satellites.append(satellite_sphere)
-            self.satellite_orbits.append(orbit_info)
+            nodes = []
+            for i, satellite_sphere in enumerate(self.satellites):
+                node = satellite_sphere.attachNewNode(
+                    mesh.make_node(
+                        f"satellite_lod{level}",
+                        bounds_radius=0.6,
+                        start=i * num_segments,
+                        count=num_segments
+                    )
+                )
+                node.stash()
+                nodes.append(node)
+            self.satellite_levels.append((layout, mesh, nodes))
+        self.satellite_original_positions, self.satellite_mesh, _ = self.satellite_levels[0]
     
     def store_original_vertices(self):
-        """Almacenar las posiciones originales para la animación"""
-        # Almacenar las posiciones originales de cada segmento
-        for child in self.sphere.getChildren():
-            self.original_vertices.append(child.getPos())
+        """Almacenar las posiciones originales y las tablas por segmento para la animación"""
+        # Almacenar las posiciones originales de cada segmento (comunes a todas las esferas)
+        layout_size = self.sphere_mesh.num_cards // self.sphere_bands
+        self.original_vertices = self.sphere_mesh.centers[:layout_size].copy()
+        # Direcciones y fases espaciales de cada onda, que no cambian entre frames
+        self.sphere_deformation = SphereDeformation(self.original_vertices)
     
     def animate_sphere(self, task):
         """Animar la esfera solo cuando la música esté reproduciéndose"""
         dt = globalClock.getDt()
+        self.advance(dt)
         
-        # Solo animar si la música está reproduciéndose
-        music_is_playing = False
-        if self.music_file:
-            music_is_playing = pygame.mixer.music.get_busy()
-        else:
-            # Si no hay archivo, usar simulación (siempre "playing")
-            music_is_playing = self.audio_playing
+        if self.quality_governor is not None:
+            level = self.quality_governor.update(dt)
+            if level is not None:
+                self.apply_quality_level(level)
         
+        if self.input_recorder is not None:
+            self.input_recorder.record(self, dt)
+        return task.cont
+    
+    def is_music_playing(self):
+        """Indicar si la música (o la simulación de audio) está sonando"""
+        if self.music_file:
+            return pygame.mixer.music.get_busy()
+        # Si no hay archivo, usar simulación (siempre "playing")
+        return self.audio_playing
+    
+    def advance(self, dt):
+        """Avanzar la animación `dt` segundos; la tarea usa el reloj real y el benchmark un paso fijo"""
         # Solo actualizar el tiempo y animar si la música está reproduciéndose
-        if music_is_playing:
+        if self.is_music_playing():
             self.time += dt
             
             # Obtener amplitud del audio
             self.audio_amplitude = self.get_audio_amplitude()
+            self.band_amplitudes = self.get_band_amplitudes()
             
-            # Animar cada segmento de la esfera
-            children = self.sphere.getChildren()
-            for i, child in enumerate(children):
-                if i < len(self.original_vertices):
-                    orig_pos = self.original_vertices[i]
-                    
-                    # Calcular la deformación extremadamente suave
-                    t = self.time
-                    # Frecuencias muy bajas para movimientos ultra suaves
-                    freq1 = 0.4 + self.audio_amplitude * 0.5  # Frecuencia muy reducida
-                    freq2 = 0.5 + self.audio_amplitude * 0.4
-                    freq3 = 0.3 + self.audio_amplitude * 0.6
-                    
-                    # Patrón de deformación ultra suave y orgánico
-                    wave1 = math.sin(t * freq1 + orig_pos.x * 1.0)
-                    wave2 = math.cos(t * freq2 + orig_pos.y * 1.2)
-                    wave3 = math.sin(t * freq3 + orig_pos.z * 1.4)
-                    wave4 = math.sin(t * 0.2 + orig_pos.length() * 1.0)
-                    
-                    # Combinar ondas de manera ultra suave
-                    base_deformation = (
-                        0.05 * wave1 * wave2 * wave3 * (1.0 + 0.15 * wave4)
-                    )
-                    
-                    # Amplificar la deformación de manera muy gradual
-                    audio_multiplier = 1.0 + self.audio_amplitude * 0.8  # Multiplicador ultra suave
-                    deformation = base_deformation * audio_multiplier * self.deformation_factor
-                    
-                    # Aplicar deformación radial
-                    direction = orig_pos.normalized()
-                    new_pos = orig_pos + direction * deformation
-                    child.setPos(new_pos)
-                    
-                    # Variación de color extremadamente suave
-                    audio_intensity = self.audio_amplitude
-                    # Cambios de color ultra lentos y sutiles
-                    r = 0.75 + 0.1 * math.sin(t * 0.08 + orig_pos.x * 0.2) + audio_intensity * 0.05
-                    g = 0.06 + 0.04 * math.cos(t * 0.09 + orig_pos.y * 0.25) + audio_intensity * 0.02
-                    b = 0.06 + 0.04 * math.sin(t * 0.07 + orig_pos.z * 0.22) + audio_intensity * 0.02
-                    
-                    # Asegurar que los valores estén en el rango correcto para rojo
-                    r = max(0.7, min(0.9, r))  # Rojo más estable
-                    g = max(0.0, min(0.12, g))  # Verde extremadamente limitado
-                    b = max(0.0, min(0.12, b))  # Azul extremadamente limitado
-                    
-                    child.setColor(r, g, b, 1.0)
+            if self.simulation_worker is not None:
+                # Recoger el último frame del proceso de simulación y pedirle el siguiente
+                self.simulation_frame = self.simulation_worker.latest()
+                if self.simulation_frame is None and not self.simulation_worker.running:
+                    print("El proceso de simulación ha terminado; se sigue simulando en este proceso")
+                    self.stop_simulation_process()
             
-            # Rotación extremadamente suave de la esfera solo cuando hay música
-            self.sphere.set_hpr(
-                self.sphere.get_h() + 2 * dt,   # Rotación ultra lenta
-                self.sphere.get_p() + 1.5 * dt, # Rotación ultra lenta
-                self.sphere.get_r() + 1 * dt    # Rotación ultra lenta
-            )
+            if self.simulation_worker is not None:
+                self.simulation_worker.submit(
+                    self.time,
+                    dt,
+                    self.audio_amplitude,
+                    self.band_amplitudes,
+                    self.deformation_factor,
+                    self.detail_level,
+                    self.num_satellites
+                )
             
-            # Hacer que la luz gire alrededor de la esfera solo cuando hay música (ultra suave)
-            if hasattr(self, 'dlnp'):
-                # Calcular nueva posición orbital para la luz (ultra lenta)
-                light_angle = self.time * 8  # Velocidad de rotación ultra lenta (grados por segundo)
-                light_radius = 25.0
-                light_height = 20.0
-                
-                # Posición orbital de la luz
-                light_x = math.sin(math.radians(light_angle)) * light_radius
-                light_y = -math.cos(math.radians(light_angle)) * light_radius
-                light_z = light_height
-                
-                # Actualizar posición y orientación de la luz
-                self.dlnp.set_pos(light_x, light_y, light_z)
-                self.dlnp.look_at(0, 0, 2)  # Siempre apuntar al centro de la esfera
+            self.update_sphere()
+            self.rotate_sphere(dt)
+            self.update_light()
             
             # Animar satélites orbitales
             self.animate_satellites(dt)
+            
+            self.update_scheduler.tick()
         else:
             # Cuando la música está pausada, establecer amplitud a 0
             self.audio_amplitude = 0.0
+    
+    def update_sphere(self, full=False):
+        """Deformar todos los segmentos de la esfera y recolorear un tramo de ellos (o todos con `full`)"""
+        if self.simulation_worker is not None and not full:
+            # Calculados en el proceso de simulación: solo copiar el último frame al buffer
+            frame = self.simulation_frame
+            if frame is not None and frame["frame"][1] == self.detail_level:
+                rows = self.sphere_mesh.num_cards * 4
+                self.sphere_mesh.upload(frame["sphere_vertices"][:rows], frame["sphere_colors"][:rows])
+            return
         
-        return task.cont
+        # Todas las esferas en una pasada, cada una con la amplitud de su banda
+        deformation = self.sphere_deformation
+        amplitudes = self.band_amplitudes
+        positions = deformation.positions(self.time, amplitudes, self.deformation_factor)
+        
+        if full:
+            self.sphere_color_waves = deformation.color_waves(self.time)
+        else:
+            # Las ondas de color cambian muy despacio: cada frame solo se recalcula un tramo
+            # round-robin; el tono de la amplitud sigue al audio en todos los segmentos
+            rows = self.update_scheduler.color_rows(positions.shape[1])
+            self.sphere_color_waves[rows] = deformation.color_waves(self.time, rows)
+        colors = deformation.shade(self.sphere_color_waves, amplitudes)
+        self.sphere_mesh.update(positions.reshape(-1, 3), colors.reshape(-1, 4))
     
-    def animate_satellites(self, dt):
-        """Animar satélites pequeños con movimiento aleatorio y colisiones directas"""
-        import random
-        t = self.time
-        
-        for i, (satellite, orbit) in enumerate(zip(self.satellites, self.satellite_orbits)):
-            # Actualizar posición con movimiento aleatorio
-            orbit['x'] += orbit['vel_x'] * dt * orbit['random_factor']
-            orbit['y'] += orbit['vel_y'] * dt * orbit['random_factor']
-            orbit['z'] += orbit['vel_z'] * dt * orbit['random_factor']
-            
-            # Añadir componente aleatorio influenciado por la música
-            random_intensity = self.audio_amplitude * 2.0
-            orbit['vel_x'] += random.uniform(-random_intensity, random_intensity) * dt
-            orbit['vel_y'] += random.uniform(-random_intensity, random_intensity) * dt
-            orbit['vel_z'] += random.uniform(-random_intensity * 0.5, random_intensity * 0.5) * dt
+    def rotate_sphere(self, dt):
+        """Rotación extremadamente suave de la esfera solo cuando hay música"""
+        # Todas las esferas giran a la vez sobre su propio centro
+        h, p, r = self.sphere_instances[0].get_hpr()
+        for instance in self.sphere_instances:
+            instance.set_hpr(
+                h + 2 * dt,   # Rotación ultra lenta
+                p + 1.5 * dt, # Rotación ultra lenta
+                r + 1 * dt    # Rotación ultra lenta
+            )
+    
+    def update_light(self):
+        """Hacer que la luz gire alrededor de la esfera solo cuando hay música (ultra suave)"""
+        if hasattr(self, 'dlnp'):
+            # Calcular nueva posición orbital para la luz (ultra lenta)
+            light_angle = self.time * 8  # Velocidad de rotación ultra lenta (grados por segundo)
+            light_radius = 25.0
+            light_height = 20.0
             
-            # Limitar velocidades para evitar movimiento demasiado rápido
-            max_vel = 3.0
-            orbit['vel_x'] = max(-max_vel, min(max_vel, orbit['vel_x']))
-            orbit['vel_y'] = max(-max_vel, min(max_vel, orbit['vel_y']))
-            orbit['vel_z'] = max(-max_vel * 0.5, min(max_vel * 0.5, orbit['vel_z']))
+            # Posición orbital de la luz
+            light_x = math.sin(math.radians(light_angle)) * light_radius
+            light_y = -math.cos(math.radians(light_angle)) * light_radius
+            light_z = light_height
             
-            # Verificar colisión con la esfera principal (centro en 0,0,2)
-            distance_to_center = math.sqrt(orbit['x']**2 + orbit['y']**2 + (orbit['z']-2)**2)
+            # Actualizar posición y orientación de la luz
+            self.dlnp.set_pos(light_x, light_y, light_z)
+            self.dlnp.look_at(0, 0, 2)  # Siempre apuntar al centro de la esfera
             
-            if distance_to_center < orbit['collision_distance']:
-                # Colisión directa - rebotar
-                orbit['collision_time'] = t
-                
-                # Calcular dirección de rebote
-                if distance_to_center > 0:
-                    normal_x = orbit['x'] / distance_to_center
-                    normal_y = orbit['y'] / distance_to_center
-                    normal_z = (orbit['z'] - 2) / distance_to_center
+            # La luz gira en todos los frames; solo el mapa de sombras se renderiza a saltos,
+            # cuando la luz ha girado lo bastante (o ha pasado el intervalo) desde el anterior
+            if self.shadow_policy.due(light_angle, self.time):
+                self.refresh_shadow_map()
+    
+    def refresh_shadow_map(self):
+        """Renderizar el mapa de sombras solo en el próximo frame y congelarlo después"""
+        if self.win is None:
+            return
+        # El buffer de sombras se crea al dibujar el primer frame con la luz (y de nuevo al
+        # cambiar su resolución)
+        shadow_buffer = self.dlnp.node().get_shadow_buffer(self.win.get_gsg())
+        if shadow_buffer is not None:
+            shadow_buffer.set_active(True)
+            shadow_buffer.set_one_shot(True)
+    
+    def animate_satellites(self, dt):
+        """Animar satélites pequeños con movimiento aleatorio y colisiones directas"""
+        # Integrar movimiento, colisiones y rebotes de todos los satélites a la vez, en los
+        # pasos fijos que quepan en este frame
+        if self.simulation_worker is not None:
+            self.upload_simulated_satellites()
+            return
+        system = self.satellite_system
+        clock = self.simulation_clock
+        for _ in range(clock.advance(dt)):
+            self.simulation_time += clock.step
+            system.step(clock.step, self.simulation_time, self.audio_amplitude)
+        
+        self.update_satellite_segments()
+        self.place_satellites(clock.alpha)
+    
+    def place_satellites(self, alpha=1.0):
+        """Aplicar a los nodos la posición y rotación del sistema, interpoladas entre los dos últimos pasos"""
+        system = self.satellite_system
+        if alpha < 1.0:
+            positions, orientations = system.interpolate(alpha)
+        else:
+            positions, orientations = system.positions, system.orientations
+        self.place_satellite_nodes(positions, orientations)
+    
+    def place_satellite_nodes(self, positions, orientations):
+        """Aplicar a cada nodo de satélite su posición y orientación"""
+        for satellite, (x, y, z), (h, p, r) in zip(
+            self.satellites, positions.tolist(), orientations.tolist()
+        ):
+            satellite.setPosHpr(x, y, z, h, p, r)
+    
+    def upload_simulated_satellites(self):
+        """Copiar los segmentos y las transformaciones del último frame del proceso de simulación"""
+        frame = self.simulation_frame
+        if frame is None or tuple(frame["frame"][1:]) != (self.detail_level, self.num_satellites):
+            return
+        rows = self.satellite_mesh.num_cards * 4
+        self.satellite_mesh.upload(frame["satellite_vertices"][:rows], frame["satellite_colors"][:rows])
+        self.place_satellite_nodes(
+            frame["node_positions"][:self.num_satellites],
+            frame["node_orientations"][:self.num_satellites]
+        )
+    
+    def start_simulation_process(self):
+        """Pasar la deformación y la física a un proceso aparte a partir del estado actual"""
+        self.simulation_worker = SimulationProcess(
+            [(mesh.centers[:mesh.num_cards // self.sphere_bands], mesh.offsets)
+             for mesh, _ in self.sphere_levels],
+            [(layout, mesh.offsets[:len(layout)]) for layout, mesh, _ in self.satellite_levels],
+            self.satellite_system,
+            self.simulation_time,
+            self.simulation_rate
+        )
+    
+    def stop_simulation_process(self):
+        """Parar el proceso de simulación"""
+        if self.simulation_worker is not None:
+            self.simulation_frame = None
+            self.simulation_worker.close()
+            self.simulation_worker = None
+    
+    def update_satellite_segments(self, full=False):
+        """Deformar los segmentos de los satélites al ritmo de la música (todos con `full`)"""
+        system = self.satellite_system
+        shape = (self.num_satellites, len(self.satellite_original_positions))
+        
+        due = None
+        if not full:
+            # Los satélites lejanos solo se deforman uno de cada pocos frames
+            camera = self.camera.get_pos(self.render)
+            offsets = system.positions - (camera.x, camera.y, camera.z)
+            due = self.update_scheduler.satellites_due(np.sqrt(np.einsum("ij,ij->i", offsets, offsets)))
+            if len(due) == self.num_satellites:
+                due = None
+        
+        positions, colors = self.satellite_deformation.deform(
+            self.time,
+            self.audio_amplitude,
+            self.deformation_factor,
+            system.collision_time,
+            due,
+            simulation_time=self.simulation_time
+        )
+        if due is None:
+            self.satellite_positions = positions.reshape(shape + (3,))
+            self.satellite_colors = colors.reshape(shape + (4,))
+        else:
+            self.satellite_positions[due] = positions.reshape(-1, shape[1], 3)
+            self.satellite_colors[due] = colors.reshape(-1, shape[1], 4)
+        self.satellite_mesh.update(
+            self.satellite_positions.reshape(-1, 3), self.satellite_colors.reshape(-1, 4)
+        )
+    
+    def update_detail_level(self):
+        """Elegir el nivel de detalle de la esfera y los satélites según la distancia de la cámara"""
+        if not hasattr(self, 'satellite_system'):
+            return
+        level = bisect.bisect_left(LOD_DISTANCES, self.camera_radius)
+        level = min(level + self.detail_bias, len(LOD_DISTANCES))
+        if level != self.detail_level:
+            self.set_detail_level(level)
+    
+    def set_detail_level(self, level):
+        """Mostrar solo la teselación del nivel `level` y deformar solo esa a partir de ahora"""
+        for index, (_, nodes) in enumerate(self.sphere_levels):
+            for node in nodes:
+                if index == level:
+                    node.unstash()
                 else:
-                    # Si está exactamente en el centro, rebotar en dirección aleatoria
-                    normal_x = random.uniform(-1, 1)
-                    normal_y = random.uniform(-1, 1)
-                    normal_z = random.uniform(-1, 1)
-                
-                # Reflejar velocidad (rebote)
-                dot_product = (orbit['vel_x'] * normal_x + 
-                              orbit['vel_y'] * normal_y + 
-                              orbit['vel_z'] * normal_z)
-                
-                orbit['vel_x'] -= 2 * dot_product * normal_x * orbit['bounce_factor']
-                orbit['vel_y'] -= 2 * dot_product * normal_y * orbit['bounce_factor']
-                orbit['vel_z'] -= 2 * dot_product * normal_z * orbit['bounce_factor']
-                
-                # Empujar fuera de la esfera para evitar que se quede atrapado
-                push_distance = orbit['collision_distance'] + 0.5
-                orbit['x'] = normal_x * push_distance
-                orbit['y'] = normal_y * push_distance
-                orbit['z'] = 2 + normal_z * push_distance
-                
-                # Añadir velocidad extra por la música durante la colisión
-                collision_boost = self.audio_amplitude * 2.0
-                orbit['vel_x'] += normal_x * collision_boost
-                orbit['vel_y'] += normal_y * collision_boost
-                orbit['vel_z'] += normal_z * collision_boost * 0.5
-            
-            # Mantener dentro de los límites del viewport
-            max_distance = 15
-            if abs(orbit['x']) > max_distance:
-                orbit['x'] = max_distance * (1 if orbit['x'] > 0 else -1)
-                orbit['vel_x'] *= -orbit['bounce_factor']
-            if abs(orbit['y']) > max_distance:
-                orbit['y'] = max_distance * (1 if orbit['y'] > 0 else -1)
-                orbit['vel_y'] *= -orbit['bounce_factor']
-            if orbit['z'] < -2:
-                orbit['z'] = -2
-                orbit['vel_z'] *= -orbit['bounce_factor']
-            elif orbit['z'] > 8:
-                orbit['z'] = 8
-                orbit['vel_z'] *= -orbit['bounce_factor']
-            
-            # Deformar los segmentos de la esfera satélite al ritmo de la música
-            if 'segments' in orbit and 'original_positions' in orbit:
-                for j, (segment, orig_pos) in enumerate(zip(orbit['segments'], orbit['original_positions'])):
-                    # Deformación más pequeña y rápida para satélites pequeños
-                    sat_freq1 = 1.2 + i * 0.3 + self.audio_amplitude * 0.8
-                    sat_freq2 = 1.5 + i * 0.2 + self.audio_amplitude * 0.6
-                    sat_freq3 = 0.9 + i * 0.4 + self.audio_amplitude * 1.0
-                    
-                    # Ondas de deformación más intensas para satélites pequeños
-                    wave1 = math.sin(t * sat_freq1 + orig_pos.x * 3.0 + i)
-                    wave2 = math.cos(t * sat_freq2 + orig_pos.y * 3.5 + i)
-                    wave3 = math.sin(t * sat_freq3 + orig_pos.z * 2.8 + i)
-                    
-                    # Deformación pequeña pero visible
-                    base_deformation = 0.02 * wave1 * wave2 * wave3
-                    
-                    # Amplificar con audio y factor de deformación
-                    sat_audio_multiplier = 1.0 + self.audio_amplitude * 0.8
-                    deformation = base_deformation * sat_audio_multiplier * self.deformation_factor
-                    
-                    # Aplicar deformación radial
-                    direction = orig_pos.normalized()
-                    new_pos = orig_pos + direction * deformation
-                    segment.setPos(new_pos)
-                    
-                    # Colores base rojos como la esfera principal
-                    base_colors = [
-                        (0.9, 0.1, 0.1),  # Rojo intenso
-                        (0.8, 0.15, 0.05),  # Rojo con toque naranja
-                        (0.85, 0.05, 0.15),  # Rojo con toque magenta
-                        (0.95, 0.08, 0.08),  # Rojo muy puro
-                    ]
-                    base_color = base_colors[i % len(base_colors)]
-                    
-                    # Variación de color con la música y colisiones
-                    collision_intensity = max(0, 1.0 - (t - orbit['collision_time']) * 4)
-                    color_variation = 0.1 * math.sin(t * 0.2 + j * 0.2) * self.audio_amplitude
-                    bright_factor = 1.0 + collision_intensity * 0.5
-                    
-                    r = max(0.1, min(1.0, (base_color[0] + color_variation) * bright_factor))
-                    g = max(0.1, min(1.0, (base_color[1] + color_variation) * bright_factor))
-                    b = max(0.1, min(1.0, (base_color[2] + color_variation) * bright_factor))
-                    
-                    segment.setColor(r, g, b, 0.95)
-            
-            # Aplicar posición final
-            satellite.setPos(orbit['x'], orbit['y'], orbit['z'])
-            
-            # Rotación rápida y aleatoria
-            rotation_speed = 50 * (1 + self.audio_amplitude)
-            satellite.setHpr(
-                satellite.getH() + rotation_speed * dt * (1 + i * 0.5),
-                satellite.getP() + rotation_speed * dt * (1 + i * 0.3),
-                satellite.getR() + rotation_speed * dt * (1 + i * 0.7)
-            )
+                    node.stash()
+        for index, (_, _, nodes) in enumerate(self.satellite_levels):
+            for node in nodes:
+                if index == level:
+                    node.unstash()
+                else:
+                    node.stash()
+        
+        self.sphere_mesh = self.sphere_levels[level][0]
+        self.store_original_vertices()
+        self.satellite_original_positions, self.satellite_mesh, _ = self.satellite_levels[level]
+        self.satellite_deformation = SatelliteDeformation(
+            self.satellite_original_positions, self.num_satellites
+        )
+        self.detail_level = level
+        
+        # El nivel recién activado conserva la geometría de la última vez que se usó
+        self.update_sphere(full=True)
+        self.update_satellite_segments(full=True)
+    
+    def apply_quality_level(self, level):
+        """Aplicar el escalón `level` de calidad: resolución de sombras, teselación y satélites"""
+        rung = self.quality_ladder[level]
+        self.quality_level = level
+        
+        if rung["shadow_size"] != self.shadow_size:
+            self.shadow_size = rung["shadow_size"]
+            self.dlnp.node().set_shadow_caster(True, self.shadow_size, self.shadow_size)
+        
+        if rung["num_satellites"] != self.num_satellites:
+            self.set_satellite_count(rung["num_satellites"])
+        
+        if rung["detail_bias"] != self.detail_bias:
+            self.detail_bias = rung["detail_bias"]
+            self.update_detail_level()
+        
+        print(
+            f"Calidad: escalón {level} (sombras {self.shadow_size}, "
+            f"detalle -{self.detail_bias}, satélites {self.num_satellites})"
+        )
+    
+    def set_satellite_count(self, num_satellites):
+        """Cambiar el número de satélites en escena conservando el movimiento de los que siguen"""
+        for satellite in self.satellites:
+            satellite.removeNode()
+        self.satellites = []
+        self.num_satellites = num_satellites
+        self.satellite_system.resize(num_satellites)
+        self.build_satellite_levels()
+        
+        # Las mallas nuevas empiezan con todos los niveles ocultos
+        self.detail_level = None
+        self.update_detail_level()
+        self.place_satellites()
     
     def update_camera(self):
         """Actualizar la posición de la cámara según los controles"""
@@ -623,6 +1102,9 @@ class OrganicSphere(ShowBase):
         )
         self.camera.look_at(0, 0, 2)
         
+        # Cambiar de nivel de detalle si el zoom cruza un umbral
+        self.update_detail_level()
+        
         # Actualizar el indicador de zoom
         self.update_zoom_display()
     
@@ -679,9 +1161,11 @@ class OrganicSphere(ShowBase):
         if self.music_file:
             if pygame.mixer.music.get_busy():
                 pygame.mixer.music.pause()
+                self.music_paused = True
                 print("Música pausada")
             else:
                 pygame.mixer.music.unpause()
+                self.music_paused = False
                 print("Música reanudada")
         else:
             print("No hay archivo de música cargado")
@@ -690,12 +1174,178 @@ class OrganicSphere(ShowBase):
         """Reiniciar la música desde el principio"""
         if self.music_file:
             pygame.mixer.music.stop()
-            pygame.mixer.music.play(-1)  # Reproducir en bucle
+            if self.audio_envelope is None:
+                # La posición vuelve a cero, así que el análisis en vivo también
+                self.start_audio_analysis()
+            pygame.mixer.music.play()
+            self.music_paused = False
+            # Parar el mixer vacía la cola: la pista siguiente se vuelve a encolar
+            self.next_queued = False
+            self.track_position = 0.0
             print("Música reiniciada")
         else:
             print("No hay archivo de música cargado")
 
+    def toggle_timings(self):
+        """Activar o desactivar la grabación de tiempos por fase del frame"""
+        self.profiler.toggle(self.timings_path)
+    
+    def destroy(self):
+        """Parar el proceso de simulación antes de cerrar la aplicación"""
+        self.stop_simulation_process()
+        ShowBase.destroy(self)
+
+def display_refresh_rate():
+    """Frecuencia de refresco (Hz) del modo de pantalla actual, o None si no se conoce"""
+    pipe = GraphicsPipeSelection.get_global_ptr().make_default_pipe()
+    info = pipe.get_display_information() if pipe else None
+    if info is None:
+        return None
+    index = info.get_current_display_mode_index()
+    if index < 0:
+        return None
+    return info.get_display_mode_refresh_rate(index) or None
+
+
+def main(argv=None):
+    """Crear y ejecutar la aplicación con las opciones de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Visualización de audio con Panda3D")
+    parser.add_argument(
+        "--quality",
+        choices=tuple(QUALITY_PRESETS),
+        default=DEFAULT_QUALITY,
+        help="preset de calidad inicial (teselación, satélites y resolución de sombras)"
+    )
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        help="presupuesto de tiempo por frame que mantiene el gobernador de calidad "
+             "(por defecto, un intervalo de refresco de la pantalla)"
+    )
+    parser.add_argument(
+        "--fixed-quality",
+        action="store_true",
+        help="mantener el preset sin ajustar la calidad en tiempo de ejecución"
+    )
+    parser.add_argument(
+        "--timings",
+        metavar="ARCHIVO",
+        help="grabar los tiempos de cada fase por frame en ARCHIVO (.csv o .jsonl)"
+    )
+    parser.add_argument(
+        "--pstats",
+        action="store_true",
+        help="conectar con un servidor PStats para ver los tiempos por fase en vivo"
+    )
+    parser.add_argument(
+        "--playlist",
+        metavar="RUTA",
+        help="directorio de MP3, lista .m3u/.m3u8 o archivo a reproducir (por defecto, los MP3 del proyecto)"
+    )
+    parser.add_argument(
+        "--shuffle",
+        action="store_true",
+        help="reproducir la lista en orden aleatorio"
+    )
+    parser.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default=DEFAULT_RENDER_MODE,
+        help="segmentos opacos, con alpha-to-coverage o con mezcla alfa ordenada (aspecto original)"
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        help="limitar el render a FPS frames por segundo (por defecto, sin límite más allá del vsync)"
+    )
+    parser.add_argument(
+        "--sim-rate",
+        type=float,
+        default=DEFAULT_SIMULATION_RATE,
+        help="pasos por segundo de la física de satélites, independiente del render"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="semilla de la simulación de satélites, para repetir exactamente su movimiento"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="ARCHIVO",
+        help="grabar las entradas de cada frame en ARCHIVO para repetirlas con panda3d_animacion.replay"
+    )
+    parser.add_argument(
+        "--sim-process",
+        action="store_true",
+        help="calcular la deformación y la física en un proceso aparte (otro núcleo)"
+    )
+    parser.add_argument(
+        "--bands",
+        type=int,
+        choices=range(1, MAX_SPHERE_BANDS + 1),
+        default=1,
+        metavar="N",
+        help=f"una esfera por banda de frecuencia, de 1 a {MAX_SPHERE_BANDS} (graves, medios y agudos con 3)"
+    )
+    parser.add_argument(
+        "--shadow-size",
+        type=int,
+        help="resolución del mapa de sombras (por defecto, la del preset de calidad)"
+    )
+    parser.add_argument(
+        "--shadow-angle",
+        type=float,
+        default=DEFAULT_SHADOW_ANGLE,
+        help="grados que gira la luz antes de volver a renderizar las sombras (0: cada frame)"
+    )
+    parser.add_argument(
+        "--shadow-rate",
+        type=float,
+        default=DEFAULT_SHADOW_RATE,
+        help="refrescos de las sombras por segundo como mínimo (0: solo por ángulo)"
+    )
+    args = parser.parse_args(argv)
+    
+    if args.pstats:
+        PStatClient.connect()
+    
+    settings = dict(QUALITY_PRESETS[args.quality])
+    if args.shadow_size:
+        settings["shadow_size"] = args.shadow_size
+    
+    seed = args.seed
+    if args.record and seed is None:
+        # El registro necesita una semilla conocida para repetir el movimiento de los satélites
+        seed = int(np.random.default_rng().integers(2 ** 32))
+    
+    # Ajustes de la escena, que se guardan también en la cabecera del registro de entradas
+    settings.update(
+        shadow_angle=args.shadow_angle,
+        shadow_rate=args.shadow_rate,
+        render_mode=args.render_mode,
+        simulation_rate=args.sim_rate,
+        simulation_process=args.sim_process,
+        seed=seed,
+        sphere_bands=args.bands,
+    )
+    target_ms = args.target_ms
+    if target_ms is None and not args.fixed_quality:
+        target_ms = refresh_frame_budget(display_refresh_rate())
+    app = OrganicSphere(
+        timings_path=args.timings,
+        frame_budget=None if args.fixed_quality else capped_frame_budget(target_ms, args.fps),
+        playlist=args.playlist,
+        shuffle=args.shuffle,
+        **settings
+    )
+    if args.record:
+        app.input_recorder = InputRecorder(args.record, settings)
+    if args.fps:
+        # Limitar el ritmo de render, por ejemplo para no gastar CPU en un quiosco
+        globalClock.setMode(ClockObject.MLimited)
+        globalClock.setFrameRate(args.fps)
+    app.run()
+
 # Crear y ejecutar la aplicación
 if __name__ == "__main__":
-    app = OrganicSphere()
-    app.run()
+    main()
@@ -0,0 +1,163 @@
+from panda3d.core import (
+    BoundingSphere,
+    Geom,
+    GeomNode,
+    GeomTriangles,
+    GeomVertexArrayFormat,
+    GeomVertexData,
+    GeomVertexFormat,
+    LPoint3f,
+    LQuaternionf,
+    LVector3f,
+    look_at,
+)
+import numpy as np
+
+# Esquinas de una tarjeta en su espacio local (plano XZ, cara frontal hacia -Y),
+# en orden antihorario visto desde el frente, igual que CardMaker
+CARD_CORNERS = ((-1.0, -1.0), (1.0, -1.0), (1.0, 1.0), (-1.0, 1.0))
+
+# Dos triángulos por tarjeta sobre sus cuatro esquinas
+CARD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+
+# Índices de las columnas dentro del GeomVertexData
+POSITION_ARRAY = 0
+NORMAL_ARRAY = 1
+COLOR_ARRAY = 2
+
+
+def card_vertex_format():
+    """Formato con posiciones y colores dinámicos y normales estáticas en arrays separados"""
+    position_array = GeomVertexArrayFormat()
+    position_array.add_column("vertex", 3, Geom.NT_float32, Geom.C_point)
+    normal_array = GeomVertexArrayFormat()
+    normal_array.add_column("normal", 3, Geom.NT_float32, Geom.C_normal)
+    color_array = GeomVertexArrayFormat()
+    color_array.add_column("color", 4, Geom.NT_float32, Geom.C_color)
+
+    vertex_format = GeomVertexFormat()
+    vertex_format.add_array(position_array)
+    vertex_format.add_array(normal_array)
+    vertex_format.add_array(color_array)
+    return GeomVertexFormat.register_format(vertex_format)
+
+
+def card_corner_offsets(centers, size):
+    """Calcular las esquinas de cada tarjeta orientada hacia el origen (como lookAt(0, 0, 0))"""
+    offsets = np.empty((len(centers), 4, 3), dtype=np.float32)
+    normals = np.empty((len(centers), 3), dtype=np.float32)
+    quat = LQuaternionf()
+    up = LVector3f(0, 0, 1)
+    for i, (x, y, z) in enumerate(centers):
+        look_at(quat, LVector3f(-x, -y, -z), up)
+        for k, (cx, cz) in enumerate(CARD_CORNERS):
+            offsets[i, k] = quat.xform(LVector3f(cx * size, 0, cz * size))
+        normals[i] = quat.xform(LVector3f(0, -1, 0))
+    return offsets, normals
+
+
+def card_vertices(centers, offsets, out=None):
+    """Posiciones de las cuatro esquinas de cada tarjeta, con forma (tarjetas, 4, 3)"""
+    return np.add(np.asarray(centers, dtype=np.float32)[:, None, :], offsets, out=out)
+
+
+def card_colors(colors, out=None):
+    """Color RGBA de cada tarjeta repetido en sus cuatro esquinas, con forma (tarjetas, 4, 4)"""
+    colors = np.asarray(colors, dtype=np.float32)[:, None, :]
+    if out is None:
+        return np.repeat(colors, 4, axis=1)
+    out[:] = colors
+    return out
+
+
+class CardMesh:
+    """Conjunto de tarjetas orientadas al centro almacenadas en un único vertex buffer dinámico
+
+    Con `copies > 1` el buffer contiene varias copias consecutivas de la misma disposición de
+    tarjetas (por ejemplo, una por satélite), que comparten el cálculo de las esquinas.
+    `corners` son las esquinas y normales ya calculadas de la disposición (por ejemplo,
+    leídas de la caché de geometría con `read_layout`); si no se dan, se calculan con `size`.
+    """
+
+    def __init__(self, name, centers, size, colors, copies=1, corners=None):
+        layout = np.ascontiguousarray(centers, dtype=np.float32)
+        if corners is None:
+            corners = card_corner_offsets(layout, size)
+        layout_offsets, layout_normals = corners
+        self.centers = np.tile(layout, (copies, 1))
+        self.num_cards = len(self.centers)
+        self.offsets = np.tile(layout_offsets, (copies, 1, 1))
+        normals = np.tile(layout_normals, (copies, 1))
+
+        self.vdata = GeomVertexData(name, card_vertex_format(), Geom.UH_dynamic)
+        self.vdata.set_num_rows(self.num_cards * 4)
+        # Las normales no cambian al desplazar las tarjetas radialmente
+        self.vdata.modify_array(NORMAL_ARRAY).set_usage_hint(Geom.UH_static)
+        self.vdata.modify_array_handle(NORMAL_ARRAY).copy_data_from(
+            np.ascontiguousarray(np.repeat(normals, 4, axis=0))
+        )
+
+        self.update(self.centers, colors)
+
+    def make_geom(self, start=0, count=None):
+        """Crear un Geom que dibuja las tarjetas [start, start + count) del buffer compartido"""
+        if count is None:
+            count = self.num_cards - start
+
+        # Escribir todos los índices de una vez en lugar de añadir triángulo a triángulo
+        first_vertices = np.arange(start, start + count, dtype=np.uint32) * 4
+        indices = (first_vertices[:, None] + CARD_TRIANGLES).ravel()
+        triangles = GeomTriangles(Geom.UH_static)
+        triangles.set_index_type(Geom.NT_uint32)
+        index_array = triangles.modify_vertices()
+        index_array.unclean_set_num_rows(len(indices))
+        index_array.modify_handle().copy_data_from(indices)
+
+        geom = Geom(self.vdata)
+        geom.add_primitive(triangles)
+        return geom
+
+    def make_node(self, name, bounds_radius, start=0, count=None):
+        """Crear un GeomNode con límites fijos para no recalcularlos en cada frame"""
+        node = GeomNode(name)
+        node.add_geom(self.make_geom(start, count))
+        node.set_bounds(BoundingSphere(LPoint3f(0, 0, 0), bounds_radius))
+        node.set_final(True)
+        return node
+
+    def update(self, centers, colors):
+        """Escribir en bloque las nuevas posiciones de las tarjetas y sus colores RGBA"""
+        self.upload(
+            card_vertices(centers, self.offsets),
+            None if colors is None else card_colors(colors)
+        )
+
+    def upload(self, vertices, vertex_colors=None):
+        """Copiar al buffer posiciones y colores ya expandidos a las esquinas (`card_vertices`)"""
+        self.vdata.modify_array_handle(POSITION_ARRAY).copy_data_from(vertices)
+        if vertex_colors is not None:
+            self.vdata.modify_array_handle(COLOR_ARRAY).copy_data_from(vertex_colors)
+
+
+def layout_node(name, centers, size, colors):
+    """GeomNode con la geometría de reposo de una disposición de tarjetas, para guardarla en .bam"""
+    node = GeomNode(name)
+    node.add_geom(CardMesh(name, centers, size, colors).make_geom())
+    return node
+
+
+def vertex_array(vdata, index, columns):
+    """Copiar un array de floats del GeomVertexData a NumPy, con forma (tarjetas, 4, columnas)"""
+    data = np.frombuffer(memoryview(vdata.get_array(index)), dtype=np.float32)
+    return data.reshape(-1, 4, columns).copy()
+
+
+def read_layout(node):
+    """Centros, esquinas y normales (`corners`) y colores de una disposición de `layout_node`"""
+    vdata = node.get_geom(0).get_vertex_data()
+    positions = vertex_array(vdata, POSITION_ARRAY, 3)
+    centers = positions.mean(axis=1)
+    offsets = positions - centers[:, None, :]
+    normals = vertex_array(vdata, NORMAL_ARRAY, 3)[:, 0]
+    colors = vertex_array(vdata, COLOR_ARRAY, 4)[:, 0]
+    return centers, (offsets, normals), colors
@@ -0,0 +1,126 @@
+import os
+import threading
+
+import numpy as np
+import pygame
+
+from panda3d_animacion.audio import analyze_track
+
+PLAYLIST_EXTENSIONS = (".m3u", ".m3u8")
+# Retroceso (en segundos) de la posición del mixer que indica que ya suena la pista encolada
+TRACK_CHANGE_MARGIN = 1.0
+
+
+def find_music_files(directory):
+    """Archivos MP3 de un directorio, en orden alfabético"""
+    return sorted(
+        os.path.join(directory, file)
+        for file in os.listdir(directory)
+        if file.lower().endswith('.mp3')
+    )
+
+
+def read_m3u(path):
+    """Pistas de una lista M3U, con las rutas relativas resueltas respecto a la propia lista"""
+    base = os.path.dirname(os.path.abspath(path))
+    tracks = []
+    with open(path, encoding="utf-8-sig", errors="replace") as playlist_file:
+        for line in playlist_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            track = os.path.join(base, os.path.expanduser(line))
+            if os.path.isfile(track):
+                tracks.append(track)
+    return tracks
+
+
+def load_playlist(source):
+    """Pistas de un directorio (sus MP3), de una lista M3U o de un único archivo"""
+    if os.path.isdir(source):
+        return find_music_files(source)
+    if source.lower().endswith(PLAYLIST_EXTENSIONS):
+        return read_m3u(source)
+    return [source]
+
+
+class Playlist:
+    """Orden de reproducción de las pistas, opcionalmente aleatorio, que se repite en bucle"""
+
+    def __init__(self, tracks, shuffle=False, rng=None):
+        self.tracks = list(tracks)
+        self.order = list(range(len(self.tracks)))
+        if shuffle:
+            rng = rng if rng is not None else np.random.default_rng()
+            self.order = [int(index) for index in rng.permutation(len(self.tracks))]
+        self.position = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    def peek(self, step=0):
+        """Pista situada `step` posiciones después (o antes) de la actual"""
+        return self.tracks[self.order[(self.position + step) % len(self.order)]]
+
+    def advance(self, step=1):
+        """Avanzar (o retroceder) `step` posiciones y devolver la nueva pista actual"""
+        self.position = (self.position + step) % len(self.order)
+        return self.peek()
+
+    def discard(self, step):
+        """Quitar del orden la pista situada `step` posiciones después de la actual (ilegible)"""
+        index = (self.position + step) % len(self.order)
+        del self.order[index]
+        if index < self.position:
+            self.position -= 1
+        self.position %= max(1, len(self.order))
+
+
+class TrackPreparation(threading.Thread):
+    """Preparación de una pista en segundo plano antes de que empiece a sonar
+
+    Primero lee el archivo completo (al calcular su clave en la caché de análisis), de modo
+    que al encolarla en el mixer no haya que esperar al disco, y marca `readable`. Después
+    abre su envolvente desde la caché (esperando al análisis en segundo plano de la misma
+    pista, si lo hay) o la analiza y la guarda, y marca `analyzed`. El hilo
+    de render solo consulta los eventos; nunca espera a la preparación. Si el archivo no se
+    puede leer, `analyzed` se marca sin `readable`.
+    """
+
+    def __init__(self, path, analysis_cache, sample_rate):
+        super().__init__(name="track-preparation", daemon=True)
+        self.path = path
+        self.analysis_cache = analysis_cache
+        self.sample_rate = sample_rate
+        self.envelope = None
+        self.error = None
+        self.readable = threading.Event()
+        self.analyzed = threading.Event()
+
+    @classmethod
+    def reuse(cls, path, envelope):
+        """Preparación ya terminada de la pista que está sonando, con su envolvente
+
+        Con una lista de una sola pista la siguiente es la misma: si ya tiene envolvente, el
+        archivo está leído y no hay nada que analizar, así que no se lanza ningún hilo.
+        """
+        track = cls(path, None, None)
+        track.envelope = envelope
+        track.readable.set()
+        track.analyzed.set()
+        return track
+
+    def run(self):
+        try:
+            key = self.analysis_cache.key(self.path, self.sample_rate)
+            self.readable.set()
+            self.analysis_cache.wait(key)
+            envelope = self.analysis_cache.load(key, self.sample_rate)
+            if envelope is None:
+                envelope = analyze_track(self.path)
+                self.analysis_cache.store(key, envelope)
+            self.envelope = envelope
+        except (pygame.error, OSError, ValueError) as e:
+            self.error = e
+        finally:
+            self.analyzed.set()
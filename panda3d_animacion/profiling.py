@@ -0,0 +1,179 @@
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from panda3d.core import PStatCollector
+
+# Métodos de OrganicSphere que forman cada fase del frame y su nombre en los informes
+PROFILED_PHASES = (
+    ("get_audio_amplitude", "amplitude"),
+    ("update_sphere", "sphere"),
+    ("rotate_sphere", "rotation"),
+    ("update_light", "light"),
+    ("animate_satellites", "satellites"),
+)
+
+DEFAULT_TIMINGS_PATH = "frame_timings.csv"
+
+
+class TimingRecorder:
+    """Escritura de una fila de tiempos por frame en CSV o JSON lines (según la extensión)"""
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+        self.file = open(path, "w", newline="")
+        self.json_lines = os.path.splitext(path)[1].lower() in (".jsonl", ".json")
+        if not self.json_lines:
+            self.writer = csv.DictWriter(self.file, fieldnames=fields)
+            self.writer.writeheader()
+
+    def __call__(self, row):
+        """Escribir la fila de un frame"""
+        if self.json_lines:
+            self.file.write(json.dumps(row) + "\n")
+        else:
+            self.writer.writerow(row)
+
+    def close(self):
+        """Cerrar el archivo de grabación"""
+        self.file.close()
+
+
+class FrameProfiler:
+    """Ámbitos de tiempo por fase del frame, como colectores de PStats y con grabación opcional
+
+    Mientras está desactivado no añade ningún coste: los métodos de la aplicación solo se
+    envuelven con la medición al activarlo y se restauran al desactivarlo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = False
+        self.frame = 0
+        self.sinks = []
+        self.recorder = None
+        self.frame_collector = PStatCollector("App:Animation")
+        self.collectors = {
+            label: PStatCollector(f"App:Animation:{label.capitalize()}")
+            for _, label in PROFILED_PHASES
+        }
+        self.fields = ["frame", "time", "dt", "advance"] + [label for _, label in PROFILED_PHASES]
+        self._row = None
+
+    def enable(self, path=None, sink=None):
+        """Empezar a medir; con `path` se graba a archivo y `sink` recibe cada fila"""
+        if self.enabled:
+            return
+        if path is not None:
+            self.recorder = TimingRecorder(path, self.fields)
+            self.sinks.append(self.recorder)
+        if sink is not None:
+            self.sinks.append(sink)
+
+        for method_name, label in PROFILED_PHASES:
+            setattr(self.app, method_name, self._timed(label, getattr(self.app, method_name)))
+        self.app.advance = self._timed_frame(self.app.advance)
+        self.enabled = True
+
+    def disable(self):
+        """Dejar de medir, restaurar los métodos originales y cerrar la grabación"""
+        if not self.enabled:
+            return
+        for method_name, _ in PROFILED_PHASES:
+            delattr(self.app, method_name)
+        del self.app.advance
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Tiempos por frame guardados en {self.recorder.path}")
+            self.recorder = None
+        self.sinks = []
+        self.enabled = False
+
+    def toggle(self, path=DEFAULT_TIMINGS_PATH):
+        """Activar o desactivar la grabación de tiempos a `path`"""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable(path)
+            print(f"Grabando tiempos por frame en {path}")
+
+    def _timed(self, label, method):
+        """Envolver una fase para medirla en PStats y en la fila del frame actual"""
+        collector = self.collectors[label]
+
+        def timed(*args, **kwargs):
+            collector.start()
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            collector.stop()
+            if self._row is not None:
+                self._row[label] = elapsed * 1000.0
+            return result
+
+        return timed
+
+    def _timed_frame(self, advance):
+        """Envolver el paso completo del frame y entregar su fila a los destinos"""
+        def timed_advance(dt):
+            self._row = dict.fromkeys(self.fields, 0.0)
+            self.frame_collector.start()
+            start = time.perf_counter()
+            advance(dt)
+            elapsed = time.perf_counter() - start
+            self.frame_collector.stop()
+
+            row = self._row
+            self._row = None
+            row["frame"] = self.frame
+            row["time"] = self.app.time
+            row["dt"] = dt
+            row["advance"] = elapsed * 1000.0
+            self.frame += 1
+            for sink in self.sinks:
+                sink(row)
+
+        return timed_advance
+
+
+class StartupTimer:
+    """Desglose del tiempo de arranque por fases, medidas desde cualquier hilo"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # (inicio, duración, fase, hilo), en segundos desde `start`
+        self.milestones = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Medir el bloque como la fase `name` del hilo actual"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.phases.append(
+                    (start - self.start, end - start, name, threading.current_thread().name)
+                )
+
+    def mark(self, name):
+        """Anotar el instante en que se alcanza un hito (primer frame, audio listo...)"""
+        with self.lock:
+            self.milestones.setdefault(name, time.perf_counter() - self.start)
+
+    def report(self):
+        """Mostrar las fases por orden de inicio y los hitos alcanzados"""
+        with self.lock:
+            phases = sorted(self.phases)
+            milestones = sorted(self.milestones.items(), key=lambda item: item[1])
+        print("Arranque (ms):")
+        for start, duration, name, thread in phases:
+            print(f"  {name:<22} {start * 1000:8.1f} +{duration * 1000:8.1f}  [{thread}]")
+        for name, moment in milestones:
+            print(f"  {name:<22} {moment * 1000:8.1f}")
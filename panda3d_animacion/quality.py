@@ -0,0 +1,141 @@
+import math
+from collections import deque
+
+# Ajustes de cada preset: anillos de la esfera, segmentos por lado de cada satélite,
+# número de satélites y resolución del mapa de sombras
+QUALITY_PRESETS = {
+    "low": {"segments": 16, "satellite_segments": 8, "num_satellites": 4, "shadow_size": 512},
+    "medium": {"segments": 22, "satellite_segments": 12, "num_satellites": 6, "shadow_size": 1024},
+    "high": {"segments": 30, "satellite_segments": 16, "num_satellites": 10, "shadow_size": 2048},
+    "ultra": {"segments": 45, "satellite_segments": 20, "num_satellites": 20, "shadow_size": 4096},
+}
+DEFAULT_QUALITY = "high"
+DEFAULT_FRAME_BUDGET_MS = 16.6
+
+# Modos de dibujo de los segmentos: opacos, alpha-to-coverage sobre un framebuffer
+# multisample (ninguno de los dos se ordena) o mezcla alfa ordenada de atrás adelante
+# (el aspecto translúcido original)
+RENDER_MODES = ("opaque", "coverage", "alpha")
+DEFAULT_RENDER_MODE = "opaque"
+MULTISAMPLES = 4
+
+MIN_SHADOW_SIZE = 256
+MAX_DETAIL_BIAS = 2
+
+# Frames de la media móvil y márgenes de histéresis sobre el presupuesto
+GOVERNOR_WINDOW = 60
+DOWNGRADE_MARGIN = 0.10
+UPGRADE_MARGIN = 0.02
+# Segundos estables antes de probar a subir la calidad, y tope tras subidas fallidas
+PROBE_DELAY = 2.0
+MAX_PROBE_DELAY = 64.0
+
+
+def quality_ladder(shadow_size, num_satellites):
+    """Escalones de calidad de mayor a menor, a partir de los ajustes del preset
+
+    Cada escalón es un dict con la resolución de sombras, cuántos niveles de detalle se
+    bajan respecto a los que elige la distancia de la cámara y cuántos satélites se muestran.
+    Se sacrifica primero lo más barato de perder (sombras), luego la teselación y por último
+    los satélites.
+    """
+    steps = [
+        (1, 0, 1),
+        (2, 0, 1),
+        (2, 1, 1),
+        (4, 1, 2),
+        (4, 2, 2),
+        (8, 2, 4),
+    ]
+    ladder = []
+    for shadow_divisor, detail_bias, satellite_divisor in steps:
+        rung = {
+            "shadow_size": max(MIN_SHADOW_SIZE, shadow_size // shadow_divisor),
+            "detail_bias": min(detail_bias, MAX_DETAIL_BIAS),
+            "num_satellites": max(1, math.ceil(num_satellites / satellite_divisor)),
+        }
+        if not ladder or rung != ladder[-1]:
+            ladder.append(rung)
+    return ladder
+
+
+def refresh_frame_budget(refresh_rate=None):
+    """Presupuesto por frame (ms) por defecto: un intervalo de refresco de la pantalla
+
+    Con vsync el frame no puede durar menos que el intervalo de refresco, así que a 50 Hz un
+    presupuesto de 60 Hz se daría por incumplido en todos los frames. Si no se conoce la
+    frecuencia (sin ventana o sin que el sistema la informe) se supone una pantalla de 60 Hz.
+    """
+    if not refresh_rate or refresh_rate <= 0:
+        return DEFAULT_FRAME_BUDGET_MS
+    return 1000.0 / refresh_rate
+
+
+def capped_frame_budget(target_ms, fps=None):
+    """Presupuesto por frame (ms) del gobernador con el render limitado a `fps`
+
+    El gobernador mide la duración completa del frame, que con el límite de `--fps` incluye
+    la espera hasta el frame siguiente: por debajo de 1000 / `fps` ms no se puede bajar, así
+    que un presupuesto menor se daría por incumplido en todos los frames.
+    """
+    if not fps:
+        return target_ms
+    return max(target_ms, 1000.0 / fps)
+
+
+class QualityGovernor:
+    """Elección del escalón de calidad que mantiene la media móvil del frame dentro del presupuesto
+
+    Baja un escalón en cuanto la media supera el presupuesto en más de `DOWNGRADE_MARGIN`.
+    Para subir espera a que la media esté dentro del presupuesto durante `PROBE_DELAY`
+    segundos; si la subida no se sostiene, la espera se duplica antes del siguiente intento.
+    Con vsync el frame nunca baja del intervalo de refresco, así que esta prueba con espera
+    creciente es la forma de descubrir margen sin oscilar.
+    """
+
+    def __init__(self, target_ms, num_levels, window=GOVERNOR_WINDOW):
+        self.target = target_ms / 1000.0
+        self.num_levels = num_levels
+        self.level = 0  # 0 es la calidad máxima del preset
+        self.frame_times = deque(maxlen=window)
+        self.probe_delay = PROBE_DELAY
+        self.stable_time = 0.0
+        self.probing = False
+
+    def average(self):
+        """Media móvil del tiempo de frame en segundos"""
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def update(self, dt):
+        """Registrar la duración de un frame; devuelve el nuevo escalón si hay que cambiar, o None"""
+        self.frame_times.append(dt)
+        self.stable_time += dt
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return None
+
+        average = self.average()
+        if average > self.target * (1 + DOWNGRADE_MARGIN):
+            if self.level == self.num_levels - 1:
+                return None
+            if self.probing:
+                # La última subida no se sostuvo: esperar más antes de volver a probar
+                self.probe_delay = min(self.probe_delay * 2, MAX_PROBE_DELAY)
+            return self._change(self.level + 1, probing=False)
+
+        if self.probing:
+            # Una ventana completa dentro del presupuesto tras subir: la subida se sostiene
+            self.probing = False
+            self.probe_delay = PROBE_DELAY
+
+        if (average <= self.target * (1 + UPGRADE_MARGIN) and self.level > 0
+                and self.stable_time >= self.probe_delay):
+            return self._change(self.level - 1, probing=True)
+        return None
+
+    def _change(self, level, probing):
+        """Pasar al escalón `level` y empezar una ventana de medida nueva"""
+        self.level = level
+        self.probing = probing
+        self.stable_time = 0.0
+        self.frame_times.clear()
+        return level
@@ -0,0 +1,213 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from panda3d_animacion.audio import AudioEnvelope
+from panda3d_animacion.bench import configure_headless
+from panda3d_animacion.quality import DEFAULT_RENDER_MODE, RENDER_MODES
+
+FRAME_FORMATS = ("png", "rgb")
+DEFAULT_SIMULATED_DURATION = 10.0
+
+# Ajustes del render compartidos por todos los procesos del pool
+_settings = None
+
+
+def load_envelope(path):
+    """Envolvente de la pista (desde la caché si ya se analizó) como arrays serializables"""
+    import pygame
+
+    from panda3d_animacion.audio import analyze_track
+    from panda3d_animacion.audio_cache import AnalysisCache
+
+    # Solo se usa el decodificador del mixer, no hace falta un dispositivo de audio
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=1024)
+    pygame.mixer.init()
+    sample_rate = pygame.mixer.get_init()[0]
+
+    cache = AnalysisCache()
+    key = cache.key(path, sample_rate)
+    envelope = cache.load(key, sample_rate)
+    if envelope is None:
+        envelope = analyze_track(path)
+        cache.store(key, envelope)
+    pygame.mixer.quit()
+
+    # Copiar fuera del memmap para poder enviarla a los procesos del pool
+    return np.array(envelope.rms), np.array(envelope.bands), envelope.frame_rate
+
+
+def frame_path(output_dir, frame, frame_format):
+    """Ruta del archivo de un frame de la secuencia"""
+    return os.path.join(output_dir, f"frame_{frame:06d}.{frame_format}")
+
+
+def write_frame(window, path, frame_format):
+    """Guardar el contenido actual del buffer como PNG o como RGB de 8 bits sin cabecera"""
+    from panda3d.core import Filename
+
+    if frame_format == "png":
+        window.saveScreenshot(Filename.from_os_specific(path))
+        return
+
+    texture = window.getScreenshot()
+    pixels = np.frombuffer(texture.getRamImageAs("RGB"), dtype=np.uint8)
+    pixels = pixels.reshape(texture.getYSize(), texture.getXSize(), 3)
+    # Panda3D guarda las imágenes de abajo arriba
+    pixels[::-1].tofile(path)
+
+
+def init_worker(settings):
+    """Recibir los ajustes del render en cada proceso del pool"""
+    global _settings
+    _settings = settings
+
+
+def render_chunk(chunk):
+    """Renderizar los frames [start, stop) en un proceso propio y devolver cuántos se escribieron
+
+    La simulación de los frames anteriores al tramo se recorre sin renderizar, con la misma
+    semilla y el mismo paso fijo, así que cada tramo empieza exactamente en el estado en que
+    termina el anterior y la secuencia no depende de cómo se reparta entre procesos.
+    """
+    start, stop = chunk
+    settings = _settings
+    configure_headless("offscreen", settings["display"], size=settings["size"])
+    from panda3d_animacion.main import OrganicSphere
+
+    app = OrganicSphere(
+        segments=settings["segments"],
+        num_satellites=settings["satellites"],
+        audio=False,
+        seed=settings["seed"],
+        shadow_angle=0,  # Sombras en todos los frames: el tramo no depende de los anteriores
+        render_mode=settings["render_mode"],
+        sphere_bands=settings["bands"],
+    )
+    app.aspect2d.hide()  # El vídeo no lleva los controles en pantalla
+    if settings["envelope"] is not None:
+        app.audio_envelope = AudioEnvelope(*settings["envelope"])
+
+    dt = 1.0 / settings["fps"]
+    for _ in range(start):
+        app.advance(dt)
+
+    for frame in range(start, stop):
+        app.advance(dt)
+        app.graphicsEngine.renderFrame()
+        write_frame(
+            app.win,
+            frame_path(settings["output_dir"], frame, settings["format"]),
+            settings["format"]
+        )
+
+    app.destroy()
+    return stop - start
+
+
+def split_frames(num_frames, chunk_frames):
+    """Dividir la línea de tiempo en tramos consecutivos de `chunk_frames` frames"""
+    return [
+        (start, min(start + chunk_frames, num_frames))
+        for start in range(0, num_frames, chunk_frames)
+    ]
+
+
+def render_sequence(output_dir, duration=None, fps=60, size=(1280, 720), track=None, seed=0,
+                    frame_format="png", processes=None, chunk_frames=None, segments=30,
+                    num_satellites=10, display="p3tinydisplay", render_mode=DEFAULT_RENDER_MODE,
+                    sphere_bands=1):
+    """Renderizar la animación offline como secuencia de imágenes, repartida en un pool de procesos"""
+    envelope = load_envelope(track) if track else None
+    if duration is None:
+        duration = len(envelope[0]) / envelope[2] if envelope else DEFAULT_SIMULATED_DURATION
+    num_frames = int(round(duration * fps))
+
+    processes = processes or os.cpu_count() or 1
+    chunk_frames = chunk_frames or max(1, math.ceil(num_frames / processes))
+    chunks = split_frames(num_frames, chunk_frames)
+
+    os.makedirs(output_dir, exist_ok=True)
+    settings = {
+        "output_dir": output_dir,
+        "fps": fps,
+        "size": tuple(size),
+        "seed": seed,
+        "format": frame_format,
+        "segments": segments,
+        "satellites": num_satellites,
+        "display": display,
+        "render_mode": render_mode,
+        "bands": sphere_bands,
+        "envelope": envelope,
+    }
+
+    # Procesos nuevos (spawn) y uno por tramo: ShowBase no se puede crear dos veces por proceso
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    written = 0
+    with context.Pool(
+        min(processes, len(chunks)),
+        initializer=init_worker,
+        initargs=(settings,),
+        maxtasksperchild=1
+    ) as pool:
+        for count in pool.imap_unordered(render_chunk, chunks):
+            written += count
+            print(f"{written}/{num_frames} frames")
+
+    elapsed = time.perf_counter() - start
+    print(f"{num_frames} frames en {elapsed:.1f} s ({num_frames / elapsed:.1f} frames/s)")
+    return num_frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render offline de la animación a una secuencia de imágenes"
+    )
+    parser.add_argument("output_dir", help="directorio donde escribir los frames")
+    parser.add_argument("--track", help="pista MP3 que marca la amplitud (sin ella, audio simulado)")
+    parser.add_argument("--duration", type=float,
+                        help="segundos a renderizar (por defecto, la duración de la pista)")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--size", type=int, nargs=2, default=[1280, 720], metavar=("ANCHO", "ALTO"))
+    parser.add_argument("--seed", type=int, default=0, help="semilla de la simulación de satélites")
+    parser.add_argument("--format", choices=FRAME_FORMATS, default="png",
+                        help="PNG, o RGB de 8 bits sin cabecera (un archivo por frame)")
+    parser.add_argument("--processes", type=int, help="procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--chunk-frames", type=int, help="frames por tramo de trabajo")
+    parser.add_argument("--segments", type=int, default=30)
+    parser.add_argument("--satellites", type=int, default=10)
+    parser.add_argument("--display", default="p3tinydisplay",
+                        help="módulo de display de Panda3D (p3tinydisplay renderiza por CPU)")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default=DEFAULT_RENDER_MODE,
+                        help="segmentos opacos, con alpha-to-coverage o con mezcla alfa ordenada")
+    parser.add_argument("--bands", type=int, default=1,
+                        help="esferas, una por banda de frecuencia de la pista")
+
+    args = parser.parse_args(argv)
+    render_sequence(
+        args.output_dir,
+        duration=args.duration,
+        fps=args.fps,
+        size=args.size,
+        track=args.track,
+        seed=args.seed,
+        frame_format=args.format,
+        processes=args.processes,
+        chunk_frames=args.chunk_frames,
+        segments=args.segments,
+        num_satellites=args.satellites,
+        display=args.display,
+        render_mode=args.render_mode,
+        sphere_bands=args.bands,
+    )
+
+
+if __name__ == "__main__":
+    main()
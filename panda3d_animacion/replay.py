@@ -0,0 +1,191 @@
+import argparse
+import atexit
+import json
+import math
+import struct
+import time
+
+import numpy as np
+
+from panda3d_animacion.audio import NUM_BANDS
+from panda3d_animacion.bench import configure_headless, percentiles
+
+# Cabecera del registro: identificador y ajustes de la escena en JSON, rellenada hasta
+# HEADER_SIZE bytes para que los registros empiecen en una posición fija
+INPUT_LOG_MAGIC = b"P3DINPUT"
+INPUT_LOG_VERSION = 2
+HEADER_SIZE = 512
+
+# Entradas de un frame, con tamaño fijo: el registro se puede abrir con np.memmap
+INPUT_RECORD = np.dtype([
+    ("dt", "<f8"),
+    ("audio_amplitude", "<f8"),
+    ("deformation_factor", "<f8"),
+    ("volume", "<f4"),
+    ("camera_radius", "<f4"),
+    ("camera_angle", "<f4"),
+    ("camera_height", "<f4"),
+    ("quality_level", "u1"),
+    ("playing", "u1"),
+    ("audio_bands", "<f4", (NUM_BANDS,)),  # NaN si no hay análisis por bandas
+])
+# Misma disposición que INPUT_RECORD, para escribir cada frame sin crear arrays
+RECORD_STRUCT = struct.Struct(f"<3d4f2B{NUM_BANDS}f")
+NO_BANDS = (math.nan,) * NUM_BANDS
+
+# Frames más lentos que se listan al terminar la reproducción
+SLOWEST_FRAMES = 5
+
+
+class InputRecorder:
+    """Grabación de las entradas de cada frame en un registro binario de solo añadido
+
+    Se guardan el `dt`, la amplitud del audio y su energía por banda, los sliders, la cámara,
+    el escalón de calidad y si la animación avanzaba, más los ajustes de la escena (con la
+    semilla de los satélites) en la cabecera. Con eso `replay_log` repite la misma secuencia
+    de frames sin audio ni interacción. Si el proceso se corta, como mucho se pierde el último registro a medias.
+    """
+
+    def __init__(self, path, settings):
+        self.path = path
+        header = json.dumps({"version": INPUT_LOG_VERSION, "settings": settings}).encode()
+        if len(INPUT_LOG_MAGIC) + len(header) > HEADER_SIZE:
+            raise ValueError("Los ajustes de la escena no caben en la cabecera del registro")
+        self.file = open(path, "wb")
+        self.file.write(INPUT_LOG_MAGIC + header.ljust(HEADER_SIZE - len(INPUT_LOG_MAGIC)))
+        self.frames = 0
+        atexit.register(self.close)
+
+    def record(self, app, dt):
+        """Añadir las entradas con que `app` acaba de avanzar un frame de `dt` segundos"""
+        bands = NO_BANDS if app.audio_bands is None else app.audio_bands
+        self.file.write(RECORD_STRUCT.pack(
+            dt,
+            app.audio_amplitude,
+            app.deformation_factor,
+            app.volume,
+            app.camera_radius,
+            app.camera_angle,
+            app.camera_height,
+            app.quality_level,
+            app.is_music_playing(),
+            *bands,
+        ))
+        self.frames += 1
+
+    def close(self):
+        """Cerrar el registro"""
+        if not self.file.closed:
+            self.file.close()
+            print(f"Entradas de {self.frames} frames grabadas en {self.path}")
+
+
+def read_input_log(path):
+    """Ajustes de la escena y registros (array mapeado en memoria) de un registro de entradas"""
+    with open(path, "rb") as log_file:
+        header = log_file.read(HEADER_SIZE)
+        log_file.seek(0, 2)
+        size = log_file.tell()
+    if not header.startswith(INPUT_LOG_MAGIC):
+        raise ValueError(f"{path} no es un registro de entradas")
+    metadata = json.loads(header[len(INPUT_LOG_MAGIC):].decode())
+    if metadata["version"] != INPUT_LOG_VERSION:
+        raise ValueError(f"Versión de registro no soportada: {metadata['version']}")
+
+    # Un registro cortado a mitad de frame se lee hasta el último frame completo
+    count = (size - HEADER_SIZE) // INPUT_RECORD.itemsize
+    if count == 0:
+        return metadata["settings"], np.empty(0, dtype=INPUT_RECORD)
+    records = np.memmap(path, dtype=INPUT_RECORD, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return metadata["settings"], records
+
+
+def apply_inputs(app, record):
+    """Dejar la aplicación con las entradas grabadas de un frame antes de avanzarlo"""
+    app.audio_playing = bool(record["playing"])
+    app.replayed_amplitude = float(record["audio_amplitude"])
+    bands = record["audio_bands"]
+    app.audio_bands = None if np.isnan(bands[0]) else np.array(bands)
+
+    # Los sliders se mueven igual que en vivo, con su texto en pantalla
+    if record["deformation_factor"] != app.deformation_factor:
+        app.deformation_slider["value"] = float(record["deformation_factor"])
+        app.update_deformation()
+    if record["volume"] != np.float32(app.volume):
+        app.volume_slider["value"] = float(record["volume"])
+        app.update_volume()
+
+    camera = (float(record["camera_radius"]), float(record["camera_angle"]),
+              float(record["camera_height"]))
+    if camera != (app.camera_radius, app.camera_angle, app.camera_height):
+        app.camera_radius, app.camera_angle, app.camera_height = camera
+        app.update_camera()
+
+
+def replay_log(path, frames=None, timings_path=None):
+    """Repetir a máxima velocidad los frames de un registro de entradas y medir cada uno"""
+    settings, records = read_input_log(path)
+    if frames is not None:
+        records = records[:frames]
+    from panda3d_animacion.main import OrganicSphere
+
+    # Sin audio ni gobernador de calidad: la amplitud y los escalones salen del registro
+    app = OrganicSphere(audio=False, timings_path=timings_path, **settings)
+
+    frame_times = []
+    for record in records:
+        apply_inputs(app, record)
+        start = time.perf_counter()
+        app.advance(float(record["dt"]))
+        app.graphicsEngine.renderFrame()
+        frame_times.append(time.perf_counter() - start)
+        if record["quality_level"] != app.quality_level:
+            app.apply_quality_level(int(record["quality_level"]))
+
+    app.profiler.disable()
+    app.destroy()
+    return frame_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reproducción de un registro de entradas grabado con --record"
+    )
+    parser.add_argument("log", help="registro de entradas (.p3di)")
+    parser.add_argument("--frames", type=int, help="reproducir solo los primeros FRAMES frames")
+    parser.add_argument("--window-type", choices=("onscreen", "offscreen", "none"),
+                        default="offscreen",
+                        help="con ventana, en un buffer offscreen o sin render")
+    parser.add_argument("--display", default="p3tinydisplay",
+                        help="módulo de display de Panda3D sin ventana (p3tinydisplay renderiza por CPU)")
+    parser.add_argument("--timings", metavar="ARCHIVO",
+                        help="grabar los tiempos de cada fase por frame en ARCHIVO (.csv o .jsonl)")
+    parser.add_argument("--pstats", action="store_true",
+                        help="conectar con un servidor PStats para ver los tiempos por fase en vivo")
+
+    args = parser.parse_args(argv)
+    if args.window_type == "onscreen":
+        from panda3d.core import loadPrcFileData
+        loadPrcFileData("replay", "audio-library-name null\nsync-video false")
+    else:
+        configure_headless(args.window_type, args.display)
+    if args.pstats:
+        from panda3d.core import PStatClient
+        PStatClient.connect()
+
+    frame_times = replay_log(args.log, args.frames, args.timings)
+    if not frame_times:
+        print("El registro no tiene frames")
+        return
+    frame_ms = percentiles(frame_times)
+    print(
+        f"{len(frame_times)} frames: p50 {frame_ms['p50']:.3f} ms, p95 {frame_ms['p95']:.3f} ms, "
+        f"p99 {frame_ms['p99']:.3f} ms"
+    )
+    print("Frames más lentos:")
+    for frame in np.argsort(frame_times)[::-1][:SLOWEST_FRAMES]:
+        print(f"  {frame:>8} {frame_times[frame] * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import numpy as np
+
+# Centro de la esfera principal contra la que chocan los satélites y distancia de colisión
+SPHERE_CENTER = np.array([0.0, 0.0, 2.0])
+SPHERE_COLLISION_DISTANCE = 3.5
+
+# Límites del viewport: ±max_distance en X/Y y [min_z, max_z] en Z
+MAX_DISTANCE = 15.0
+MIN_Z = -2.0
+MAX_Z = 8.0
+
+MAX_VELOCITY = 3.0
+
+# Números aleatorios que se generan de una vez para el jitter y los rebotes de los satélites
+RANDOM_BLOCK_SIZE = 16384
+
+BOUNDS_MIN = np.array([-MAX_DISTANCE, -MAX_DISTANCE, MIN_Z])
+BOUNDS_MAX = np.array([MAX_DISTANCE, MAX_DISTANCE, MAX_Z])
+
+# Celda propia más la mitad de las 26 vecinas, para visitar cada par de celdas una sola vez
+HALF_NEIGHBORHOOD = [(0, 0, 0)] + [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1)
+    for dy in (-1, 0, 1)
+    for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+
+def find_close_pairs(positions, distance):
+    """Encontrar los pares (i, j), i < j, a menos de `distance` usando una rejilla uniforme
+
+    Los puntos se agrupan en celdas de lado `distance` sobre la caja del viewport, así que
+    solo se comparan puntos de celdas vecinas y el coste crece casi linealmente.
+    """
+    n = len(positions)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Celdas con un margen de una celda por lado para que los vecinos no se salgan de la rejilla
+    grid_shape = np.ceil((BOUNDS_MAX - BOUNDS_MIN) / distance).astype(np.int64) + 1
+    cells = np.floor((positions - BOUNDS_MIN) / distance).astype(np.int64)
+    np.clip(cells, 0, grid_shape - 1, out=cells)
+    cells += 1
+    dims = grid_shape + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    # Ordenar por celda y tabular dónde empieza cada celda (ordenación por conteo)
+    order = np.argsort(keys, kind="stable")
+    cell_counts = np.bincount(keys, minlength=int(np.prod(dims)))
+    cell_starts = np.cumsum(cell_counts) - cell_counts
+    indices = np.arange(n)
+
+    pairs_i = []
+    pairs_j = []
+    for dx, dy, dz in HALF_NEIGHBORHOOD:
+        neighbor_keys = keys + (dx * dims[1] + dy) * dims[2] + dz
+        counts = cell_counts[neighbor_keys]
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        start = cell_starts[neighbor_keys]
+
+        # Expandir cada rango [start, end) de la celda vecina en pares candidatos
+        first = np.repeat(indices, counts)
+        position_in_range = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(start, counts) + position_in_range]
+        if (dx, dy, dz) == (0, 0, 0):
+            keep = first < second
+            first = first[keep]
+            second = second[keep]
+        pairs_i.append(np.minimum(first, second))
+        pairs_j.append(np.maximum(first, second))
+
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    pairs_i = np.concatenate(pairs_i)
+    pairs_j = np.concatenate(pairs_j)
+    offsets = positions[pairs_i] - positions[pairs_j]
+    close = np.einsum("ij,ij->i", offsets, offsets) < distance * distance
+    return pairs_i[close], pairs_j[close]
+
+
+def scatter_add(target, indices, values):
+    """Sumar `values` en las filas `indices` de `target`, acumulando índices repetidos"""
+    for axis in range(target.shape[1]):
+        target[:, axis] += np.bincount(indices, values[:, axis], minlength=len(target))
+
+
+def find_close_pairs_bruteforce(positions, distance):
+    """Versión O(n²) de `find_close_pairs`, como referencia para validar y comparar"""
+    pairs_i, pairs_j = np.triu_indices(len(positions), k=1)
+    offsets = positions[pairs_i] - positions[pairs_j]
+    close = np.einsum("ij,ij->i", offsets, offsets) < distance * distance
+    return pairs_i[close], pairs_j[close]
+
+
+class UniformBuffer:
+    """Números uniformes en [-1, 1) generados por bloques con un `Generator` de NumPy
+
+    Cada paso de la física toma de un bloque ya generado los números que necesita, y el
+    generador solo se llama cuando el bloque se agota. La secuencia depende únicamente de la
+    semilla del generador.
+    """
+
+    def __init__(self, rng, block_size=RANDOM_BLOCK_SIZE):
+        self.rng = rng
+        self.block_size = block_size
+        self.block = np.empty(0)
+        self.position = 0
+
+    def take(self, rows, columns=3):
+        """Siguientes números del bloque con forma (`rows`, `columns`), como vista de solo lectura"""
+        count = rows * columns
+        if self.position + count > len(self.block):
+            # Lo que queda del bloque anterior se descarta
+            self.block = self.rng.uniform(-1.0, 1.0, max(self.block_size, count))
+            self.block.flags.writeable = False
+            self.position = 0
+        values = self.block[self.position:self.position + count]
+        self.position += count
+        return values.reshape(rows, columns)
+
+
+class SatelliteSystem:
+    """Estado de todos los satélites en arrays contiguos con integración vectorizada
+
+    `spheres` son los centros (k, 3) y las distancias de colisión (k,) de las esferas contra
+    las que rebotan los satélites; por defecto, solo la esfera principal.
+    """
+
+    def __init__(self, num_satellites, rng=None, spheres=None):
+        self.num_satellites = num_satellites
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.uniform = UniformBuffer(self.rng)  # Jitter por paso, generado por bloques
+        self.bounce_factor = 0.8  # Factor de rebote al chocar
+        if spheres is None:
+            spheres = (SPHERE_CENTER[None, :], np.array([SPHERE_COLLISION_DISTANCE]))
+        self.sphere_centers = np.asarray(spheres[0], dtype=np.float64)
+        self.sphere_distances = np.asarray(spheres[1], dtype=np.float64)
+        self.satellite_radius = 0.4  # Radio de cada satélite para colisiones entre ellos
+        self.satellite_collisions = True
+
+        n = num_satellites
+        self.positions, self.velocities, self.random_factor = self._spawn(n)
+        self.collision_time = np.zeros(n)  # Tiempo de la última colisión
+
+        # Orientación (HPR) y velocidad de giro relativa de cada satélite
+        self.orientations = np.zeros((n, 3))
+        self.spin_rates = self._spin_rates(n)
+
+        # Estado anterior al último paso, para dibujar interpolando entre pasos fijos
+        self.previous_positions = self.positions.copy()
+        self.previous_orientations = self.orientations.copy()
+
+    def _spawn(self, n):
+        """Posición, velocidad y aleatoriedad individual iniciales de `n` satélites nuevos"""
+        # Posición y velocidad iniciales aleatorias
+        positions = np.column_stack((
+            self.rng.uniform(-10, 10, n),
+            self.rng.uniform(-10, 10, n),
+            self.rng.uniform(-2, 6, n),
+        ))
+        velocities = np.column_stack((
+            self.rng.uniform(-2, 2, n),
+            self.rng.uniform(-2, 2, n),
+            self.rng.uniform(-1, 1, n),
+        ))
+        random_factor = self.rng.uniform(0.5, 1.5, n)  # Aleatoriedad individual
+        return positions, velocities, random_factor
+
+    def _spin_rates(self, n):
+        """Velocidad de giro relativa (HPR) de cada satélite según su índice"""
+        index = np.arange(n, dtype=np.float64)
+        return np.column_stack((1 + index * 0.5, 1 + index * 0.3, 1 + index * 0.7))
+
+    def resize(self, num_satellites):
+        """Cambiar el número de satélites conservando el estado de los que se mantienen"""
+        keep = min(num_satellites, self.num_satellites)
+        added = num_satellites - keep
+        positions, velocities, random_factor = self._spawn(added)
+        self.positions = np.concatenate((self.positions[:keep], positions))
+        self.velocities = np.concatenate((self.velocities[:keep], velocities))
+        self.random_factor = np.concatenate((self.random_factor[:keep], random_factor))
+        self.collision_time = np.concatenate((self.collision_time[:keep], np.zeros(added)))
+        self.orientations = np.concatenate((self.orientations[:keep], np.zeros((added, 3))))
+        self.spin_rates = self._spin_rates(num_satellites)
+        self.num_satellites = num_satellites
+        self.previous_positions = self.positions.copy()
+        self.previous_orientations = self.orientations.copy()
+
+    def step(self, dt, time, audio_amplitude):
+        """Avanzar la simulación de todos los satélites un paso de `dt` segundos"""
+        n = self.num_satellites
+        positions = self.positions
+        velocities = self.velocities
+        self.previous_positions[:] = positions
+        self.previous_orientations[:] = self.orientations
+
+        # Actualizar posición con movimiento aleatorio
+        positions += velocities * (dt * self.random_factor)[:, None]
+
+        # Añadir componente aleatorio influenciado por la música
+        random_intensity = audio_amplitude * 2.0
+        jitter = self.uniform.take(n) * (random_intensity, random_intensity, random_intensity * 0.5)
+        velocities += jitter * dt
+
+        # Limitar velocidades para evitar movimiento demasiado rápido
+        np.clip(velocities[:, :2], -MAX_VELOCITY, MAX_VELOCITY, out=velocities[:, :2])
+        np.clip(velocities[:, 2], -MAX_VELOCITY * 0.5, MAX_VELOCITY * 0.5, out=velocities[:, 2])
+
+        self._collide_with_sphere(time, audio_amplitude)
+        self._bounce_on_bounds()
+        if self.satellite_collisions:
+            self._collide_with_each_other(time)
+
+        # Rotación rápida, más intensa con la música
+        rotation_speed = 50 * (1 + audio_amplitude)
+        self.orientations += self.spin_rates * (rotation_speed * dt)
+        np.mod(self.orientations, 360.0, out=self.orientations)
+
+    def interpolate(self, alpha):
+        """Posiciones y orientaciones a una fracción `alpha` del último paso"""
+        positions = self.previous_positions + (self.positions - self.previous_positions) * alpha
+        # Las orientaciones se guardan módulo 360: interpolar por el giro más corto
+        turn = (self.orientations - self.previous_orientations + 180.0) % 360.0 - 180.0
+        return positions, self.previous_orientations + turn * alpha
+
+    def _collide_with_sphere(self, time, audio_amplitude):
+        """Rebotar los satélites que han entrado en alguna de las esferas"""
+        if len(self.sphere_centers) == 1:
+            # Una sola esfera (el caso habitual) sin la dimensión de las esferas, que es más rápido
+            sphere = np.zeros(self.num_satellites, dtype=np.intp)
+            offsets = self.positions - self.sphere_centers[0]
+            distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+            hit = np.flatnonzero(distances < self.sphere_distances[0])
+        else:
+            # Con varias esferas, cada satélite rebota en la que más ha penetrado
+            all_offsets = self.positions[:, None, :] - self.sphere_centers
+            all_distances = np.sqrt(np.einsum("ijk,ijk->ij", all_offsets, all_offsets))
+            sphere = np.argmin(all_distances - self.sphere_distances, axis=1)
+            rows = np.arange(self.num_satellites)
+            offsets = all_offsets[rows, sphere]
+            distances = all_distances[rows, sphere]
+            hit = np.flatnonzero(distances < self.sphere_distances[sphere])
+        if len(hit) == 0:
+            return
+
+        self.collision_time[hit] = time
+        centers = self.sphere_centers[sphere[hit]]
+        collision_distances = self.sphere_distances[sphere[hit]]
+
+        # Dirección de rebote; si está exactamente en el centro, usar una dirección aleatoria
+        hit_distances = distances[hit]
+        normals = np.empty((len(hit), 3))
+        centered = hit_distances == 0
+        normals[~centered] = offsets[hit[~centered]] / hit_distances[~centered, None]
+        normals[centered] = self.uniform.take(int(centered.sum()))
+
+        # Reflejar velocidad (rebote)
+        velocities = self.velocities[hit]
+        dot_product = np.einsum("ij,ij->i", velocities, normals)
+        velocities -= (2 * dot_product * self.bounce_factor)[:, None] * normals
+
+        # Empujar fuera de la esfera para evitar que se quede atrapado
+        push_distance = collision_distances + 0.5
+        self.positions[hit] = centers + normals * push_distance[:, None]
+
+        # Añadir velocidad extra por la música durante la colisión
+        collision_boost = audio_amplitude * 2.0
+        velocities += normals * (collision_boost, collision_boost, collision_boost * 0.5)
+        self.velocities[hit] = velocities
+
+    def _collide_with_each_other(self, time):
+        """Rebotar los pares de satélites que se tocan, con el mismo factor de rebote"""
+        contact_distance = 2 * self.satellite_radius
+        pairs_i, pairs_j = find_close_pairs(self.positions, contact_distance)
+        if len(pairs_i) == 0:
+            return
+
+        offsets = self.positions[pairs_i] - self.positions[pairs_j]
+        distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+        separated = distances > 0
+        pairs_i = pairs_i[separated]
+        pairs_j = pairs_j[separated]
+        distances = distances[separated]
+        normals = offsets[separated] / distances[:, None]  # De j hacia i
+
+        self.collision_time[pairs_i] = time
+        self.collision_time[pairs_j] = time
+
+        # Reflejar la velocidad de cada satélite que se mueve hacia el otro
+        dot_i = np.minimum(np.einsum("ij,ij->i", self.velocities[pairs_i], normals), 0)
+        dot_j = np.maximum(np.einsum("ij,ij->i", self.velocities[pairs_j], normals), 0)
+        scatter_add(self.velocities, pairs_i, -(2 * dot_i * self.bounce_factor)[:, None] * normals)
+        scatter_add(self.velocities, pairs_j, -(2 * dot_j * self.bounce_factor)[:, None] * normals)
+
+        # Separar los satélites para que no queden solapados
+        push = ((contact_distance - distances) * 0.5)[:, None] * normals
+        scatter_add(self.positions, pairs_i, push)
+        scatter_add(self.positions, pairs_j, -push)
+
+    def _bounce_on_bounds(self):
+        """Mantener los satélites dentro de los límites del viewport"""
+        positions = self.positions
+        velocities = self.velocities
+
+        outside = np.abs(positions[:, :2]) > MAX_DISTANCE
+        positions[:, :2] = np.where(outside, np.copysign(MAX_DISTANCE, positions[:, :2]), positions[:, :2])
+        velocities[:, :2] = np.where(outside, -self.bounce_factor * velocities[:, :2], velocities[:, :2])
+
+        outside_z = (positions[:, 2] < MIN_Z) | (positions[:, 2] > MAX_Z)
+        np.clip(positions[:, 2], MIN_Z, MAX_Z, out=positions[:, 2])
+        velocities[outside_z, 2] *= -self.bounce_factor
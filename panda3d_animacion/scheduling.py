@@ -0,0 +1,80 @@
+import numpy as np
+
+# Tramos en que se reparten los colores de la esfera (se recalcula uno por frame)
+COLOR_SLICES = 4
+# Distancia a la cámara a partir de la cual un satélite se deforma solo uno de cada
+# FAR_SATELLITE_INTERVAL frames
+FAR_SATELLITE_DISTANCE = 20.0
+FAR_SATELLITE_INTERVAL = 3
+# Pasos por segundo de la física de satélites y pasos máximos que se recuperan en un frame
+DEFAULT_SIMULATION_RATE = 60.0
+MAX_SIMULATION_STEPS = 5
+
+
+class UpdateScheduler:
+    """Reparto de los canales lentos de la animación entre frames consecutivos
+
+    Los canales rápidos (deformación radial, física, transformaciones) se actualizan cada
+    frame. Los colores de la esfera, que cambian con `t * 0.07`-`0.09`, se recalculan por
+    tramos round-robin: 1/`color_slices` de los segmentos en cada frame. Los satélites lejanos
+    se deforman uno de cada `far_interval` frames, escalonados por índice para que el coste
+    sea el mismo en todos los frames en lugar de concentrarse en uno.
+    """
+
+    def __init__(self, color_slices=COLOR_SLICES, far_distance=FAR_SATELLITE_DISTANCE,
+                 far_interval=FAR_SATELLITE_INTERVAL):
+        self.color_slices = color_slices
+        self.far_distance = far_distance
+        self.far_interval = far_interval
+        self.frame = 0
+
+    def tick(self):
+        """Pasar al frame siguiente"""
+        self.frame += 1
+
+    def color_rows(self, count):
+        """Tramo de los `count` segmentos cuyo color toca recalcular en este frame"""
+        size = -(-count // self.color_slices)
+        start = (self.frame % self.color_slices) * size
+        return slice(start, min(start + size, count))
+
+    def satellites_due(self, distances):
+        """Índices de los satélites cuya geometría toca actualizar en este frame
+
+        `distances` es la distancia de cada satélite a la cámara; los cercanos se actualizan
+        siempre.
+        """
+        due = np.asarray(distances) <= self.far_distance
+        due[self.frame % self.far_interval::self.far_interval] = True
+        return np.flatnonzero(due)
+
+
+class FixedTimestep:
+    """Acumulador que convierte el tiempo de cada frame en pasos de simulación de duración fija
+
+    La física avanza siempre `1 / rate` segundos por paso, sea cual sea la duración del frame:
+    un frame lento da varios pasos y uno rápido puede no dar ninguno. `alpha` es la fracción
+    del paso siguiente ya transcurrida, para dibujar interpolando entre los dos últimos estados.
+    """
+
+    def __init__(self, rate=DEFAULT_SIMULATION_RATE, max_steps=MAX_SIMULATION_STEPS):
+        self.step = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, dt):
+        """Sumar la duración de un frame y devolver cuántos pasos fijos tocan"""
+        self.accumulator += dt
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Tras un frame muy lento se descarta el retraso en lugar de encadenar frames
+            # cada vez más largos intentando recuperarlo
+            self.accumulator %= self.step
+            return self.max_steps
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        """Fracción (0-1) del paso siguiente que ya ha transcurrido"""
+        return min(1.0, self.accumulator / self.step)
@@ -0,0 +1,32 @@
+import math
+
+# Grados que debe girar la luz para volver a renderizar el mapa de sombras
+DEFAULT_SHADOW_ANGLE = 1.0
+# Refrescos por segundo como mínimo, para que las sombras sigan a la esfera y a los satélites
+DEFAULT_SHADOW_RATE = 10.0
+
+
+class ShadowUpdatePolicy:
+    """Elección de los frames en que se vuelve a renderizar el mapa de sombras
+
+    La luz principal gira solo unos grados por segundo, así que el mapa de profundidad de
+    un frame sirve para los siguientes. Se refresca cuando la luz ha girado al menos `angle`
+    grados desde el último refresco o cuando han pasado `1 / rate` segundos (la geometría
+    que proyecta la sombra también se mueve). Con `angle` 0 se refresca en todos los frames.
+    """
+
+    def __init__(self, angle=DEFAULT_SHADOW_ANGLE, rate=DEFAULT_SHADOW_RATE):
+        self.angle = angle
+        self.interval = 1.0 / rate if rate else math.inf
+        self.last_angle = None
+        self.last_time = None
+
+    def due(self, light_angle, time):
+        """Indicar si toca refrescar con la luz en `light_angle` grados en el instante `time`"""
+        if (self.last_angle is not None
+                and abs(light_angle - self.last_angle) < self.angle
+                and time - self.last_time < self.interval):
+            return False
+        self.last_angle = light_angle
+        self.last_time = time
+        return True
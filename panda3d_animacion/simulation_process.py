@@ -0,0 +1,233 @@
+import atexit
+import multiprocessing
+from multiprocessing import shared_memory
+from time import sleep
+
+import numpy as np
+
+from panda3d_animacion.audio import MAX_SPHERE_BANDS
+from panda3d_animacion.deformation import SatelliteDeformation, SphereDeformation
+from panda3d_animacion.mesh import card_colors, card_vertices
+from panda3d_animacion.scheduling import FixedTimestep
+
+# Espera del proceso de simulación entre dos consultas del contador de peticiones (segundos)
+POLL_INTERVAL = 0.0005
+# Espera máxima al proceso de simulación al cerrarlo antes de terminarlo a la fuerza
+STOP_TIMEOUT = 2.0
+
+# Contadores de la cabecera: último frame pedido por el render, último publicado y parada
+REQUESTED, PUBLISHED, STOP = range(3)
+
+# Cabecera del bloque compartido: contadores, entradas del frame pedido (tiempo, dt
+# acumulado, amplitud, factor de deformación), amplitud de cada esfera y configuración
+# (nivel de detalle, satélites)
+HEADER_FIELDS = (
+    ("counters", np.int64, (3,)),
+    ("inputs", np.float64, (4,)),
+    ("bands", np.float64, (MAX_SPHERE_BANDS,)),
+    ("config", np.int64, (2,)),
+)
+
+
+def slot_fields(sphere_cards, satellite_cards, max_satellites):
+    """Campos de una ranura de salida para el nivel de detalle más denso"""
+    return (
+        ("frame", np.int64, (3,)),  # Frame, nivel de detalle y satélites con que se calculó
+        ("sphere_vertices", np.float32, (sphere_cards * 4, 3)),
+        ("sphere_colors", np.float32, (sphere_cards * 4, 4)),
+        ("satellite_vertices", np.float32, (satellite_cards * 4, 3)),
+        ("satellite_colors", np.float32, (satellite_cards * 4, 4)),
+        ("node_positions", np.float64, (max_satellites, 3)),
+        ("node_orientations", np.float64, (max_satellites, 3)),
+    )
+
+
+def field_size(dtype, shape):
+    """Bytes de un campo, redondeados a 8 para que el siguiente quede alineado"""
+    size = np.dtype(dtype).itemsize * int(np.prod(shape))
+    return -(-size // 8) * 8
+
+
+class SharedFrames:
+    """Vistas NumPy sobre el bloque de memoria compartida: cabecera y dos ranuras de salida
+
+    El frame `n` se escribe en la ranura `n % 2`. El proceso de simulación solo escribe en la
+    ranura del frame pedido y el render solo lee la del último que ha recogido. El render solo
+    pide el frame `n + 1` cuando ya ha recogido el `n` y no hay ninguno en curso, así que las
+    dos ranuras nunca coinciden: no hace falta ningún cerrojo, basta con los contadores de
+    la cabecera.
+    """
+
+    def __init__(self, buffer, sphere_cards, satellite_cards, max_satellites):
+        offset = 0
+        views = []
+        for fields in (HEADER_FIELDS,) + (slot_fields(sphere_cards, satellite_cards, max_satellites),) * 2:
+            group = {}
+            for name, dtype, shape in fields:
+                group[name] = np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+                offset += field_size(dtype, shape)
+            views.append(group)
+        self.header, *self.slots = views
+
+    @staticmethod
+    def size(sphere_cards, satellite_cards, max_satellites):
+        """Bytes del bloque compartido"""
+        slot = slot_fields(sphere_cards, satellite_cards, max_satellites)
+        return (sum(field_size(dtype, shape) for _, dtype, shape in HEADER_FIELDS)
+                + 2 * sum(field_size(dtype, shape) for _, dtype, shape in slot))
+
+
+class SimulationProcess:
+    """Simulación de la esfera y los satélites en otro proceso, con salida en memoria compartida
+
+    El proceso calcula la deformación y los colores de la esfera, la física y la deformación
+    de los satélites, y deja las posiciones y colores ya expandidos a las esquinas de cada
+    tarjeta, de modo que el render solo copia bloques al vertex buffer. Cada frame el render
+    recoge el último frame publicado (`latest`) y pide el siguiente (`submit`); si el proceso
+    aún no ha terminado el anterior, el `dt` se acumula para la próxima petición. La geometría
+    dibujada va, por tanto, un frame por detrás de la entrada.
+
+    `sphere_levels` son los centros de una esfera y las esquinas de todas (una copia por
+    banda) en cada nivel de detalle, y `satellite_levels` la disposición y las esquinas de un
+    satélite en cada nivel. El estado
+    inicial de la física se copia de `satellite_system`, que a partir de ahí ya no avanza.
+    """
+
+    def __init__(self, sphere_levels, satellite_levels, satellite_system, simulation_time,
+                 simulation_rate):
+        max_satellites = satellite_system.num_satellites
+        sizes = (len(sphere_levels[0][1]), len(satellite_levels[0][0]) * max_satellites, max_satellites)
+        self.shm = shared_memory.SharedMemory(create=True, size=SharedFrames.size(*sizes))
+        self.frames = SharedFrames(self.shm.buf, *sizes)
+        self.counters = self.frames.header["counters"]
+        self.counters[:] = 0
+        self.consumed = 0  # Último frame publicado que ya ha recogido el render
+        self.pending_dt = 0.0  # Tiempo de los frames en que el proceso estaba ocupado
+
+        # spawn: el proceso no hereda el estado de Panda3D ni del mixer
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=run_simulation,
+            args=(self.shm.name, sizes, sphere_levels, satellite_levels, satellite_system,
+                  simulation_time, simulation_rate),
+            name="simulation",
+            daemon=True
+        )
+        self.process.start()
+        atexit.register(self.close)
+
+    @property
+    def running(self):
+        """Indicar si el proceso de simulación sigue vivo"""
+        return self.process.exitcode is None
+
+    def latest(self):
+        """Ranura del último frame publicado si es nuevo desde la llamada anterior, o None"""
+        published = int(self.counters[PUBLISHED])
+        if published == self.consumed:
+            return None
+        self.consumed = published
+        return self.frames.slots[published % 2]
+
+    def submit(self, time, dt, audio_amplitude, band_amplitudes, deformation_factor, detail_level,
+               num_satellites):
+        """Pedir el frame siguiente si el proceso está libre; si no, acumular `dt` para después
+
+        Un frame publicado después de `latest` se recoge antes de pedir otro: el siguiente
+        iría a la ranura que el render está leyendo.
+        """
+        self.pending_dt += dt
+        published = int(self.counters[PUBLISHED])
+        if published != self.counters[REQUESTED] or published != self.consumed:
+            return False
+        header = self.frames.header
+        header["inputs"][:] = (time, self.pending_dt, audio_amplitude, deformation_factor)
+        header["bands"][:len(band_amplitudes)] = band_amplitudes
+        header["config"][:] = (detail_level, num_satellites)
+        self.pending_dt = 0.0
+        # El contador se incrementa después de escribir la petición: es lo que la publica
+        self.counters[REQUESTED] += 1
+        return True
+
+    def close(self):
+        """Parar el proceso y liberar la memoria compartida"""
+        if self.shm is None:
+            return
+        self.counters[STOP] = 1
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.frames = self.counters = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Quedan vistas de una ranura fuera de esta clase; se liberan al salir
+            pass
+        self.shm.unlink()
+        self.shm = None
+
+
+def run_simulation(name, sizes, sphere_levels, satellite_levels, system, simulation_time,
+                   simulation_rate):
+    """Bucle del proceso de simulación: calcular y publicar cada frame que pide el render"""
+    shm = shared_memory.SharedMemory(name=name)
+    frames = SharedFrames(shm.buf, *sizes)
+    counters = frames.header["counters"]
+    clock = FixedTimestep(simulation_rate)
+    published = int(counters[PUBLISHED])
+    config = None
+
+    while not counters[STOP]:
+        requested = int(counters[REQUESTED])
+        if requested == published:
+            sleep(POLL_INTERVAL)
+            continue
+        time, dt, audio_amplitude, deformation_factor = frames.header["inputs"].tolist()
+        level, num_satellites = frames.header["config"].tolist()
+
+        if (level, num_satellites) != config:
+            # Nivel de detalle o número de satélites nuevos: tablas de deformación del nivel
+            config = (level, num_satellites)
+            centers, sphere_offsets = sphere_levels[level]
+            sphere_deformation = SphereDeformation(centers)
+            sphere_bands = len(sphere_offsets) // len(centers)
+            layout, layout_offsets = satellite_levels[level]
+            satellite_deformation = SatelliteDeformation(layout, num_satellites)
+            satellite_offsets = np.tile(layout_offsets, (num_satellites, 1, 1))
+            if num_satellites != system.num_satellites:
+                system.resize(num_satellites)
+
+        slot = frames.slots[requested % 2]
+        sphere_cards = len(sphere_offsets)
+        band_amplitudes = frames.header["bands"][:sphere_bands].copy()
+        card_vertices(
+            sphere_deformation.positions(time, band_amplitudes, deformation_factor).reshape(-1, 3),
+            sphere_offsets,
+            out=slot["sphere_vertices"][:sphere_cards * 4].reshape(-1, 4, 3)
+        )
+        card_colors(
+            sphere_deformation.colors(time, band_amplitudes).reshape(-1, 4),
+            out=slot["sphere_colors"][:sphere_cards * 4].reshape(-1, 4, 4)
+        )
+
+        for _ in range(clock.advance(dt)):
+            simulation_time += clock.step
+            system.step(clock.step, simulation_time, audio_amplitude)
+        positions, colors = satellite_deformation.deform(
+            time, audio_amplitude, deformation_factor, system.collision_time,
+            simulation_time=simulation_time
+        )
+        satellite_cards = len(satellite_offsets)
+        card_vertices(
+            positions,
+            satellite_offsets,
+            out=slot["satellite_vertices"][:satellite_cards * 4].reshape(-1, 4, 3)
+        )
+        card_colors(colors, out=slot["satellite_colors"][:satellite_cards * 4].reshape(-1, 4, 4))
+        slot["node_positions"][:num_satellites], slot["node_orientations"][:num_satellites] = (
+            system.interpolate(clock.alpha)
+        )
+
+        slot["frame"][:] = (requested, level, num_satellites)
+        counters[PUBLISHED] = requested
+        published = requested
@@ -0,0 +1,60 @@
+import threading
+
+import pygame
+
+from panda3d_animacion.playlist import Playlist, load_playlist
+
+
+class AudioStartup(threading.Thread):
+    """Preparación del audio en segundo plano mientras se construyen la ventana y la escena
+
+    Inicializa el mixer, lee la lista de reproducción, abre la envolvente de la primera pista
+    desde la caché (o programa su análisis en segundo plano) y la carga en el mixer.
+    Los pasos dependen unos de otros, así que van en un único hilo; lo que se solapa es la
+    cadena completa con el arranque de Panda3D. El hilo principal consulta `ready` y arranca
+    la reproducción.
+    """
+
+    def __init__(self, source, analysis_cache, timer, shuffle=False):
+        super().__init__(name="audio-startup", daemon=True)
+        self.source = source  # Directorio, lista M3U o archivo de audio
+        self.shuffle = shuffle
+        self.analysis_cache = analysis_cache
+        self.timer = timer
+        self.playlist = None
+        self.music_file = None
+        self.envelope = None  # Envolvente desde la caché, o None si hay que analizar en vivo
+        self.analysis_key = None  # Clave en la caché de la envolvente de la primera pista
+        self.error = None
+        self.ready = threading.Event()
+
+    def run(self):
+        try:
+            with self.timer.phase("mixer"):
+                pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=1024)
+                pygame.mixer.init()
+            with self.timer.phase("lista de reproducción"):
+                tracks = load_playlist(self.source)
+            if not tracks:
+                return
+            self.playlist = Playlist(tracks, shuffle=self.shuffle)
+            music_file = self.playlist.peek()
+            with self.timer.phase("análisis en caché"):
+                self.envelope = self.load_cached_analysis(music_file)
+            with self.timer.phase("carga de pista"):
+                pygame.mixer.music.load(music_file)
+            self.music_file = music_file
+        except (pygame.error, OSError) as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def load_cached_analysis(self, music_file):
+        """Abrir la envolvente de la pista desde la caché, o lanzar su análisis en segundo plano"""
+        sample_rate = pygame.mixer.get_init()[0]
+        key = self.analysis_cache.key(music_file, sample_rate)
+        self.analysis_key = key
+        envelope = self.analysis_cache.load(key, sample_rate)
+        if envelope is None:
+            self.analysis_cache.analyze_in_background(music_file, key)
+        return envelope
@@ -0,0 +1,87 @@
+import os
+import threading
+
+import numpy as np
+
+from panda3d_animacion import audio_cache
+from panda3d_animacion.audio import HOP_SIZE, NUM_BANDS, AudioEnvelope
+from panda3d_animacion.audio_cache import AnalysisCache
+
+SAMPLE_RATE = 44100
+
+
+def envelope(seed, frames=200):
+    """Envolvente aleatoria de `frames` hops"""
+    rng = np.random.default_rng(seed)
+    return AudioEnvelope(
+        rng.random(frames), rng.random((frames, NUM_BANDS)), SAMPLE_RATE / HOP_SIZE
+    )
+
+
+def test_round_trip(tmp_path):
+    """Una envolvente guardada se abre igual, como memmap de solo lectura"""
+    cache = AnalysisCache(str(tmp_path))
+    original = envelope(0)
+    cache.store("pista", original)
+    loaded = cache.load("pista", SAMPLE_RATE)
+    np.testing.assert_array_equal(loaded.rms, original.rms)
+    np.testing.assert_array_equal(loaded.bands, original.bands)
+    assert loaded.frame_rate == original.frame_rate
+    assert not loaded.rms.flags.writeable
+
+
+def test_missing_entry(tmp_path):
+    """Una clave sin entrada da None"""
+    assert AnalysisCache(str(tmp_path)).load("nada", SAMPLE_RATE) is None
+
+
+def test_key_depends_on_content_and_parameters(tmp_path):
+    """Renombrar la pista conserva la clave; cambiar la frecuencia o el contenido no"""
+    first = tmp_path / "a.mp3"
+    first.write_bytes(b"audio")
+    renamed = tmp_path / "b.mp3"
+    renamed.write_bytes(b"audio")
+    other = tmp_path / "c.mp3"
+    other.write_bytes(b"otro audio")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    assert cache.key(str(first), SAMPLE_RATE) == cache.key(str(renamed), SAMPLE_RATE)
+    assert cache.key(str(first), SAMPLE_RATE) != cache.key(str(first), 48000)
+    assert cache.key(str(first), SAMPLE_RATE) != cache.key(str(other), SAMPLE_RATE)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Al superar el límite se borran primero las entradas usadas hace más tiempo"""
+    cache = AnalysisCache(str(tmp_path))
+    cache.store("a", envelope(1))
+    entry_size = os.path.getsize(cache.entry_path("a"))
+    cache.max_bytes = 2 * entry_size
+    cache.store("b", envelope(2))
+    # Antigüedades explícitas: "a" la más antigua, pero se vuelve a usar después de "b"
+    os.utime(cache.entry_path("a"), (1000, 1000))
+    os.utime(cache.entry_path("b"), (2000, 2000))
+    assert cache.load("a", SAMPLE_RATE) is not None
+
+    cache.store("c", envelope(3))
+    assert cache.load("b", SAMPLE_RATE) is None
+    assert cache.load("a", SAMPLE_RATE) is not None
+    assert cache.load("c", SAMPLE_RATE) is not None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_one_background_analysis_per_key(tmp_path, monkeypatch):
+    """Pedir otra vez el análisis de una pista que se está analizando reutiliza su hilo"""
+    release = threading.Event()
+
+    def slow_analysis(path):
+        release.wait(5.0)
+        return envelope(1)
+
+    monkeypatch.setattr(audio_cache, "analyze_track", slow_analysis)
+    cache = AnalysisCache(str(tmp_path))
+    thread = cache.analyze_in_background("pista.mp3", "pista")
+    assert cache.analyze_in_background("pista.mp3", "pista") is thread
+    assert cache.analyzing("pista")
+    release.set()
+    thread.join(5.0)
+    assert not cache.analyzing("pista")
+    assert cache.load("pista", SAMPLE_RATE) is not None
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from panda3d_animacion.deformation import (
+    SatelliteDeformation,
+    SphereDeformation,
+    deform_satellite_scalar,
+    deform_sphere_scalar,
+)
+
+# Los kernels trabajan en float32 y las fórmulas de referencia en float64
+TOLERANCE = 1e-5
+
+
+def rest_positions(rng, count, radius):
+    """Posiciones de reposo aleatorias alrededor de una esfera, con una en el origen"""
+    positions = rng.normal(size=(count, 3))
+    positions *= radius / np.linalg.norm(positions, axis=1)[:, None]
+    positions *= rng.uniform(0.8, 1.2, size=(count, 1))
+    positions[0] = 0.0
+    return positions
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sphere_bands_match_scalar_reference(seed):
+    """Cada banda de un vector de amplitudes coincide con la fórmula de un solo segmento"""
+    rng = np.random.default_rng(seed)
+    vertices = rest_positions(rng, 64, 3.0)
+    amplitudes = rng.uniform(0.0, 1.5, size=5)
+    time = rng.uniform(0.0, 300.0)
+    factor = rng.uniform(0.5, 2.0)
+
+    deformation = SphereDeformation(vertices)
+    positions = deformation.positions(time, amplitudes, factor)
+    colors = deformation.colors(time, amplitudes)
+    assert positions.shape == (len(amplitudes), len(vertices), 3)
+    assert colors.shape == (len(amplitudes), len(vertices), 4)
+
+    for band, amplitude in enumerate(amplitudes):
+        expected = [deform_sphere_scalar(vertex, time, amplitude, factor) for vertex in vertices]
+        np.testing.assert_allclose(positions[band], [p for p, _ in expected], atol=TOLERANCE)
+        np.testing.assert_allclose(colors[band], [c for _, c in expected], atol=TOLERANCE)
+
+
+def test_sphere_scalar_amplitude_matches_single_band():
+    """Una amplitud escalar da lo mismo que un vector de una sola banda"""
+    rng = np.random.default_rng(7)
+    deformation = SphereDeformation(rest_positions(rng, 32, 3.0))
+    positions, colors = deformation.deform(12.5, 0.6, 1.3)
+    np.testing.assert_array_equal(positions, deformation.positions(12.5, np.array([0.6]), 1.3)[0])
+    np.testing.assert_array_equal(colors, deformation.colors(12.5, np.array([0.6]))[0])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_satellites_match_scalar_reference(seed):
+    """Posiciones y colores de cada segmento de cada satélite, incluido el brillo de colisión"""
+    rng = np.random.default_rng(seed)
+    layout = rest_positions(rng, 12, 0.3)
+    num_satellites = 6
+    time = rng.uniform(1.0, 300.0)
+    amplitude = rng.uniform(0.0, 1.5)
+    factor = rng.uniform(0.5, 2.0)
+    # Choques recientes (con brillo), antiguos y nunca
+    collision_time = time - rng.uniform(0.0, 0.5, size=num_satellites)
+    collision_time[-1] = 0.0
+
+    positions, colors = SatelliteDeformation(layout, num_satellites).deform(
+        time, amplitude, factor, collision_time
+    )
+    expected = [
+        deform_satellite_scalar(
+            position, satellite, segment, time, amplitude, factor, collision_time[satellite]
+        )
+        for satellite in range(num_satellites)
+        for segment, position in enumerate(layout)
+    ]
+    np.testing.assert_allclose(positions, [p for p, _ in expected], atol=TOLERANCE)
+    np.testing.assert_allclose(colors, [c for _, c in expected], atol=TOLERANCE)
+
+
+def test_satellite_subset_matches_full_deformation():
+    """Deformar solo algunos satélites da sus mismas filas que deformarlos todos"""
+    rng = np.random.default_rng(3)
+    layout = rest_positions(rng, 10, 0.3)
+    deformation = SatelliteDeformation(layout, 5)
+    collision_time = np.array([9.9, 0.0, 9.8, 9.5, 0.0])
+    positions, colors = deformation.deform(10.0, 0.7, 1.0, collision_time)
+    subset = np.array([3, 0])
+    sub_positions, sub_colors = deformation.deform(10.0, 0.7, 1.0, collision_time, subset)
+    rows = (subset[:, None] * len(layout) + np.arange(len(layout))).ravel()
+    np.testing.assert_array_equal(sub_positions, positions[rows])
+    np.testing.assert_array_equal(sub_colors, colors[rows])
+
+
+def test_sphere_shade_follows_the_amplitude_of_every_row():
+    """Con las ondas de color de un frame anterior, el tono de la amplitud es el actual en todas las filas"""
+    rng = np.random.default_rng(5)
+    deformation = SphereDeformation(rest_positions(rng, 48, 3.0))
+    waves = deformation.color_waves(20.0)
+    amplitudes = np.array([0.1, 1.4])
+    np.testing.assert_array_equal(deformation.shade(waves, amplitudes), deformation.colors(20.0, amplitudes))
+    rows = slice(8, 24)
+    np.testing.assert_array_equal(deformation.color_waves(20.0, rows), waves[rows])
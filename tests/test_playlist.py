@@ -0,0 +1,90 @@
+import threading
+
+import numpy as np
+
+from panda3d_animacion import audio_cache, playlist
+from panda3d_animacion.audio import HOP_SIZE, NUM_BANDS, AudioEnvelope
+from panda3d_animacion.audio_cache import AnalysisCache
+from panda3d_animacion.playlist import Playlist, TrackPreparation, read_m3u
+
+
+def test_peek_and_advance_loop():
+    """La lista avanza y retrocede en bucle"""
+    playlist = Playlist(["a", "b", "c"])
+    assert playlist.peek() == "a"
+    assert playlist.peek(1) == "b"
+    assert playlist.peek(-1) == "c"
+    assert playlist.advance(2) == "c"
+    assert playlist.advance(1) == "a"
+
+
+def test_shuffle_is_a_permutation():
+    """El orden aleatorio contiene cada pista una vez y depende solo de la semilla"""
+    tracks = [f"pista{i}" for i in range(20)]
+    first = Playlist(tracks, shuffle=True, rng=np.random.default_rng(4))
+    second = Playlist(tracks, shuffle=True, rng=np.random.default_rng(4))
+    order = [first.peek(i) for i in range(len(first))]
+    assert sorted(order) == sorted(tracks)
+    assert order == [second.peek(i) for i in range(len(second))]
+
+
+def test_discard_keeps_the_current_track():
+    """Quitar una pista antes o después de la actual no cambia la que suena"""
+    playlist = Playlist(["a", "b", "c", "d"])
+    playlist.advance(2)
+    playlist.discard(1)
+    assert playlist.peek() == "c"
+    assert playlist.peek(1) == "a"
+    playlist.discard(-1)
+    assert playlist.peek() == "c"
+    assert [playlist.peek(i) for i in range(len(playlist))] == ["c", "a"]
+
+
+def test_read_m3u_resolves_relative_paths(tmp_path):
+    """Las rutas relativas se resuelven respecto a la lista y se ignoran comentarios y ausentes"""
+    (tmp_path / "uno.mp3").write_bytes(b"")
+    (tmp_path / "musica").mkdir()
+    (tmp_path / "musica" / "dos.mp3").write_bytes(b"")
+    playlist = tmp_path / "lista.m3u"
+    playlist.write_text("#EXTM3U\nuno.mp3\n\nmusica/dos.mp3\nfalta.mp3\n", encoding="utf-8")
+    assert read_m3u(str(playlist)) == [
+        str(tmp_path / "uno.mp3"), str(tmp_path / "musica" / "dos.mp3")
+    ]
+
+
+def test_reused_preparation_is_ready():
+    """La preparación reutilizada de la pista actual está lista sin lanzar ningún hilo"""
+    track = TrackPreparation.reuse("a.mp3", "envolvente")
+    assert track.readable.is_set() and track.analyzed.is_set()
+    assert track.envelope == "envolvente"
+    assert not track.is_alive()
+
+
+def test_preparation_waits_for_the_background_analysis(tmp_path, monkeypatch):
+    """Una pista que ya se analiza en segundo plano se toma de la caché sin analizarla otra vez"""
+    track_file = tmp_path / "a.mp3"
+    track_file.write_bytes(b"audio")
+    release = threading.Event()
+    analyzed = []
+
+    def background_analysis(path):
+        release.wait(5.0)
+        return AudioEnvelope(np.ones(10), np.ones((10, NUM_BANDS)), 44100 / HOP_SIZE)
+
+    def second_analysis(path):
+        analyzed.append(path)
+        raise ValueError("análisis repetido")
+
+    monkeypatch.setattr(audio_cache, "analyze_track", background_analysis)
+    monkeypatch.setattr(playlist, "analyze_track", second_analysis)
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    cache.analyze_in_background(str(track_file), cache.key(str(track_file), 44100))
+
+    track = TrackPreparation(str(track_file), cache, 44100)
+    track.start()
+    assert track.readable.wait(5.0)
+    assert not track.analyzed.is_set()
+    release.set()
+    assert track.analyzed.wait(5.0)
+    assert track.error is None and not analyzed
+    np.testing.assert_array_equal(track.envelope.rms, np.ones(10))
@@ -0,0 +1,45 @@
+from panda3d_animacion.quality import (
+    DEFAULT_FRAME_BUDGET_MS,
+    QualityGovernor,
+    capped_frame_budget,
+    quality_ladder,
+    refresh_frame_budget,
+)
+
+
+def run_governor(target_ms, frame_time, frames):
+    """Escalón final de un gobernador alimentado con frames de duración constante"""
+    governor = QualityGovernor(target_ms, len(quality_ladder(2048, 10)))
+    for _ in range(frames):
+        governor.update(frame_time)
+    return governor.level
+
+
+def test_fps_cap_raises_the_budget():
+    """Con el render limitado a 30 FPS el presupuesto no puede ser menor que 33.3 ms"""
+    assert capped_frame_budget(16.6, 30) == 1000.0 / 30
+    assert capped_frame_budget(16.6, 120) == 16.6
+    assert capped_frame_budget(16.6, None) == 16.6
+
+
+def test_capped_frames_keep_the_quality():
+    """Frames de 1/30 s por el límite de FPS no bajan la calidad"""
+    budget = capped_frame_budget(DEFAULT_FRAME_BUDGET_MS, 30)
+    assert run_governor(budget, 1.0 / 30, 300) == 0
+    # Sin tener en cuenta el límite, cada ventana bajaba un escalón
+    assert run_governor(DEFAULT_FRAME_BUDGET_MS, 1.0 / 30, 300) > 0
+
+
+def test_slow_frames_still_lower_the_quality_under_a_cap():
+    """Por debajo del ritmo limitado el gobernador sigue bajando la calidad"""
+    budget = capped_frame_budget(DEFAULT_FRAME_BUDGET_MS, 30)
+    assert run_governor(budget, 1.0 / 20, 300) > 0
+
+
+def test_refresh_rate_sets_the_default_budget():
+    """A 50 Hz con vsync los frames de 20 ms cumplen el presupuesto por defecto"""
+    assert refresh_frame_budget(50) == 20.0
+    assert refresh_frame_budget(None) == refresh_frame_budget(0) == DEFAULT_FRAME_BUDGET_MS
+    assert run_governor(refresh_frame_budget(50), 1.0 / 50, 300) == 0
+    # Con el presupuesto de 60 Hz, cada ventana bajaba un escalón
+    assert run_governor(DEFAULT_FRAME_BUDGET_MS, 1.0 / 50, 300) > 0
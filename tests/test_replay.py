@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from panda3d_animacion.audio import NUM_BANDS
+from panda3d_animacion.replay import (
+    INPUT_RECORD,
+    RECORD_STRUCT,
+    InputRecorder,
+    apply_inputs,
+    read_input_log,
+)
+
+SETTINGS = {"seed": 42, "sphere_bands": 3, "render_mode": "opaque"}
+
+
+def fake_app(frame, bands=True):
+    """Estado de la aplicación que graba `InputRecorder` en el frame `frame`"""
+    app = SimpleNamespace(
+        audio_amplitude=0.1 * frame,
+        audio_bands=np.linspace(0.0, 1.0, NUM_BANDS) * frame if bands else None,
+        deformation_factor=1.0 + 0.01 * frame,
+        volume=0.7,
+        camera_radius=25.0 + frame,
+        camera_angle=3.0 * frame,
+        camera_height=5.0,
+        quality_level=frame % 3,
+        playing=frame % 4 != 0,
+    )
+    app.is_music_playing = lambda: app.playing
+    return app
+
+
+def test_struct_matches_the_record_dtype():
+    """El formato con que se escribe cada frame y el dtype con que se lee coinciden"""
+    assert RECORD_STRUCT.size == INPUT_RECORD.itemsize
+    values = RECORD_STRUCT.unpack(np.zeros(1, dtype=INPUT_RECORD).tobytes())
+    assert len(values) == sum(
+        int(np.prod(INPUT_RECORD.fields[name][0].shape) or 1) for name in INPUT_RECORD.names
+    )
+
+
+def test_round_trip(tmp_path):
+    """Los ajustes y las entradas de cada frame se leen tal como se grabaron"""
+    path = str(tmp_path / "entradas.p3di")
+    recorder = InputRecorder(path, SETTINGS)
+    apps = [fake_app(frame, bands=frame % 5 != 0) for frame in range(20)]
+    for frame, app in enumerate(apps):
+        recorder.record(app, 1.0 / 60.0 + frame * 1e-4)
+    recorder.close()
+
+    settings, records = read_input_log(path)
+    assert settings == SETTINGS
+    assert len(records) == len(apps)
+    for frame, (app, record) in enumerate(zip(apps, records)):
+        assert record["dt"] == 1.0 / 60.0 + frame * 1e-4
+        assert record["audio_amplitude"] == app.audio_amplitude
+        assert record["deformation_factor"] == app.deformation_factor
+        assert record["volume"] == np.float32(app.volume)
+        assert record["camera_radius"] == np.float32(app.camera_radius)
+        assert record["camera_angle"] == np.float32(app.camera_angle)
+        assert record["quality_level"] == app.quality_level
+        assert bool(record["playing"]) == app.playing
+        if app.audio_bands is None:
+            assert np.all(np.isnan(record["audio_bands"]))
+        else:
+            np.testing.assert_array_equal(record["audio_bands"], app.audio_bands.astype(np.float32))
+
+
+def test_truncated_log_keeps_whole_frames(tmp_path):
+    """Un registro cortado a mitad de frame se lee hasta el último frame completo"""
+    path = str(tmp_path / "entradas.p3di")
+    recorder = InputRecorder(path, SETTINGS)
+    for frame in range(3):
+        recorder.record(fake_app(frame), 1.0 / 60.0)
+    recorder.close()
+    with open(path, "ab") as log_file:
+        log_file.write(b"\0" * (RECORD_STRUCT.size // 2))
+    _, records = read_input_log(path)
+    assert len(records) == 3
+
+
+def test_apply_inputs_restores_the_recorded_frame(tmp_path):
+    """Aplicar un registro deja la aplicación con las entradas grabadas"""
+    path = str(tmp_path / "entradas.p3di")
+    recorder = InputRecorder(path, SETTINGS)
+    recorded = fake_app(7)
+    recorder.record(recorded, 1.0 / 60.0)
+    recorder.record(fake_app(5, bands=False), 1.0 / 60.0)
+    recorder.close()
+    _, records = read_input_log(path)
+
+    calls = []
+    app = SimpleNamespace(
+        deformation_factor=1.0, volume=0.5, camera_radius=0.0, camera_angle=0.0,
+        camera_height=0.0, deformation_slider={}, volume_slider={},
+        update_deformation=lambda: calls.append("deformation"),
+        update_volume=lambda: calls.append("volume"),
+        update_camera=lambda: calls.append("camera"),
+    )
+    apply_inputs(app, records[0])
+    assert app.audio_playing == recorded.playing
+    assert app.replayed_amplitude == recorded.audio_amplitude
+    np.testing.assert_array_equal(app.audio_bands, recorded.audio_bands.astype(np.float32))
+    assert app.deformation_slider["value"] == recorded.deformation_factor
+    assert app.volume_slider["value"] == np.float32(recorded.volume)
+    assert (app.camera_radius, app.camera_angle) == (
+        np.float32(recorded.camera_radius), np.float32(recorded.camera_angle)
+    )
+    assert calls == ["deformation", "volume", "camera"]
+
+    apply_inputs(app, records[1])
+    assert app.audio_bands is None
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from panda3d_animacion.main import SPHERE_SCALE, band_layout
+from panda3d_animacion.satellites import (
+    BOUNDS_MAX,
+    BOUNDS_MIN,
+    SPHERE_CENTER,
+    SPHERE_COLLISION_DISTANCE,
+    SatelliteSystem,
+    find_close_pairs,
+    find_close_pairs_bruteforce,
+)
+
+
+def sorted_pairs(pairs_i, pairs_j):
+    """Pares (i, j) como conjunto ordenado, sin depender del orden en que se encuentran"""
+    assert np.all(pairs_i < pairs_j)
+    return sorted(zip(pairs_i.tolist(), pairs_j.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("distance", [0.3, 1.0, 2.5])
+def test_grid_matches_bruteforce(seed, distance):
+    """La rejilla encuentra los mismos pares que la comparación de todos con todos"""
+    rng = np.random.default_rng(seed)
+    # La caja se amplía para que también haya puntos fuera de la rejilla
+    margin = 3.0
+    positions = rng.uniform(BOUNDS_MIN - margin, BOUNDS_MAX + margin, size=(600, 3))
+    assert sorted_pairs(*find_close_pairs(positions, distance)) == sorted_pairs(
+        *find_close_pairs_bruteforce(positions, distance)
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pairs_across_cell_boundaries(seed):
+    """Pares cuyos puntos caen a ambos lados de una frontera de celda, en cualquier eje"""
+    rng = np.random.default_rng(seed)
+    distance = 0.5
+    # Puntos sobre las fronteras de celda y pareja desplazada menos que `distance`
+    cells = rng.integers(0, ((BOUNDS_MAX - BOUNDS_MIN) / distance).astype(int), size=(200, 3))
+    first = BOUNDS_MIN + cells * distance + rng.uniform(-0.05, 0.05, size=(200, 3))
+    second = first + rng.uniform(-0.28, 0.28, size=(200, 3))
+    positions = np.concatenate((first, second))
+    assert sorted_pairs(*find_close_pairs(positions, distance)) == sorted_pairs(
+        *find_close_pairs_bruteforce(positions, distance)
+    )
+
+
+def test_clusters_outside_the_grid():
+    """Los puntos fuera de la caja se agrupan en las celdas del borde sin perder pares"""
+    rng = np.random.default_rng(11)
+    centers = np.array([BOUNDS_MIN - 5.0, BOUNDS_MAX + 5.0, [0.0, 0.0, BOUNDS_MAX[2] + 1.0]])
+    positions = (centers[:, None, :] + rng.normal(scale=0.4, size=(3, 40, 3))).reshape(-1, 3)
+    assert sorted_pairs(*find_close_pairs(positions, 0.6)) == sorted_pairs(
+        *find_close_pairs_bruteforce(positions, 0.6)
+    )
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_fewer_than_two_points(count):
+    """Sin al menos dos puntos no hay pares"""
+    pairs_i, pairs_j = find_close_pairs(np.zeros((count, 3)), 1.0)
+    assert len(pairs_i) == len(pairs_j) == 0
+
+
+def ring_system(count, positions):
+    """Sistema con los satélites en `positions` y una esfera por banda como en la escena"""
+    centers, scale = band_layout(count)
+    distances = np.full(len(centers), SPHERE_COLLISION_DISTANCE * scale / SPHERE_SCALE)
+    system = SatelliteSystem(len(positions), rng=np.random.default_rng(0),
+                             spheres=(centers, distances))
+    system.positions[:] = positions
+    system.velocities[:] = 0.0
+    system.satellite_collisions = False
+    return system, centers, distances
+
+
+@pytest.mark.parametrize("count", [2, 5, 16])
+def test_satellites_bounce_off_every_band_sphere(count):
+    """Un satélite dentro de cualquier esfera del anillo rebota fuera de ella"""
+    rng = np.random.default_rng(count)
+    centers, _ = band_layout(count)
+    inside = centers + rng.uniform(-0.3, 0.3, size=centers.shape)
+    system, centers, distances = ring_system(count, inside)
+    system.step(1.0 / 60.0, 5.0, 0.0)
+    assert np.all(system.collision_time == 5.0)
+    gaps = np.linalg.norm(system.positions - centers, axis=1)
+    assert np.all(gaps >= distances)
+
+
+def test_no_invisible_sphere_at_the_centre_of_the_ring():
+    """Con varias esferas, el centro de la escena queda libre"""
+    system, _, _ = ring_system(8, SPHERE_CENTER[None, :])
+    system.step(1.0 / 60.0, 5.0, 0.0)
+    assert system.collision_time[0] == 0.0
+    np.testing.assert_allclose(system.positions[0], SPHERE_CENTER)
+
+
+def test_default_is_the_main_sphere():
+    """Sin esferas explícitas los satélites chocan con la esfera principal"""
+    system = SatelliteSystem(1, rng=np.random.default_rng(0))
+    system.positions[:] = SPHERE_CENTER + (1.0, 0.0, 0.0)
+    system.velocities[:] = 0.0
+    system.step(1.0 / 60.0, 2.0, 0.0)
+    assert system.collision_time[0] == 2.0
+    assert np.linalg.norm(system.positions[0] - SPHERE_CENTER) >= SPHERE_COLLISION_DISTANCE
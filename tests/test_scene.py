@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from panda3d_animacion.bench import configure_headless
+
+DT = 1.0 / 60.0
+
+
+@pytest.fixture(scope="module")
+def app():
+    """Escena sin ventana ni audio (ShowBase solo admite una instancia por proceso)"""
+    configure_headless("none", "p3tinydisplay")
+    from panda3d_animacion.main import OrganicSphere
+
+    app = OrganicSphere(segments=12, num_satellites=150, audio=False, seed=3)
+    yield app
+    app.destroy()
+
+
+def test_collision_flash_survives_a_stall(app):
+    """Tras un frame muy lento, cuyo retraso descarta la física, los choques siguen brillando"""
+    for _ in range(30):
+        app.advance(DT)
+    app.advance(0.5)
+    # La física solo recupera unos pasos: su reloj queda por detrás del de la animación
+    assert app.time - app.simulation_time > 0.25
+
+    system = app.satellite_system
+    flashes = 0
+    for _ in range(600):
+        app.advance(DT)
+        # Satélites que han chocado en el último paso de la física
+        hit = np.flatnonzero(system.collision_time >= app.simulation_time - 1e-9)
+        if len(hit) == 0:
+            continue
+        app.update_satellite_segments(full=True)
+        _, dark = app.satellite_deformation.deform(
+            app.time, app.audio_amplitude, app.deformation_factor,
+            np.full(app.num_satellites, -np.inf)
+        )
+        dark = dark.reshape(app.satellite_colors.shape)[hit]
+        brightness = app.satellite_colors[hit][..., :3].sum(axis=(1, 2))
+        assert np.all(brightness > dark[..., :3].sum(axis=(1, 2)))
+        flashes += 1
+    assert flashes > 0
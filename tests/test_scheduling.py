@@ -0,0 +1,42 @@
+import pytest
+
+from panda3d_animacion.scheduling import FixedTimestep, UpdateScheduler
+
+
+def test_steps_follow_the_accumulated_time():
+    """Frames cortos acumulan hasta completar un paso; uno largo da varios"""
+    clock = FixedTimestep(rate=60.0, max_steps=5)
+    assert clock.advance(0.01) == 0
+    assert clock.alpha == pytest.approx(0.6)
+    assert clock.advance(0.01) == 1
+    assert clock.alpha == pytest.approx(0.2)
+    assert clock.advance(3.0 / 60.0) == 3
+    assert clock.alpha == pytest.approx(0.2)
+
+
+def test_total_steps_match_elapsed_time():
+    """Con frames irregulares por debajo del tope no se pierde ni se inventa tiempo"""
+    clock = FixedTimestep(rate=60.0, max_steps=5)
+    frame_times = [0.004, 0.021, 0.017, 0.033, 0.008, 0.05] * 50
+    steps = sum(clock.advance(dt) for dt in frame_times)
+    assert steps == int(sum(frame_times) * 60.0 + 1e-9)
+
+
+def test_long_frames_are_clamped():
+    """Un frame muy lento da como mucho `max_steps` pasos y descarta el resto del retraso"""
+    clock = FixedTimestep(rate=60.0, max_steps=5)
+    assert clock.advance(0.5) == 5
+    assert 0.0 <= clock.alpha < 1.0
+    # El retraso descartado no se recupera en los frames siguientes
+    assert clock.advance(1.0 / 60.0) <= 2
+
+
+def test_color_slices_cover_every_row_once():
+    """Los tramos de color de `color_slices` frames consecutivos cubren todas las filas"""
+    scheduler = UpdateScheduler(color_slices=4)
+    covered = []
+    for _ in range(4):
+        rows = scheduler.color_rows(103)
+        covered.extend(range(103)[rows])
+        scheduler.tick()
+    assert sorted(covered) == list(range(103))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from panda3d_animacion.simulation_process import (
+    PUBLISHED,
+    REQUESTED,
+    SharedFrames,
+    SimulationProcess,
+)
+
+SIZES = (4, 8, 2)
+
+
+@pytest.fixture
+def worker():
+    """Render sin proceso de simulación: los contadores se mueven a mano"""
+    worker = SimulationProcess.__new__(SimulationProcess)
+    worker.frames = SharedFrames(bytearray(SharedFrames.size(*SIZES)), *SIZES)
+    worker.counters = worker.frames.header["counters"]
+    worker.counters[:] = 0
+    worker.consumed = 0
+    worker.pending_dt = 0.0
+    return worker
+
+
+def submit(worker, dt=0.01):
+    return worker.submit(1.0, dt, 0.5, np.array([0.5]), 1.0, 0, 2)
+
+
+def test_frame_published_after_latest_is_collected_first(worker):
+    """Si el proceso publica entre `latest` y `submit`, no se pide un frame en la ranura que se lee"""
+    assert submit(worker)
+    worker.counters[PUBLISHED] = 1
+    reading = worker.latest()
+    assert submit(worker)
+    # El proceso publica el frame 2 antes de que el render pida el siguiente
+    worker.counters[PUBLISHED] = 2
+    assert not submit(worker)
+    assert worker.counters[REQUESTED] == 2
+    # El render recoge el frame 2 (en la otra ranura) y entonces pide el 3
+    collected = worker.latest()
+    assert collected is not None and collected["frame"] is not reading["frame"]
+    assert submit(worker)
+    assert worker.counters[REQUESTED] == 3
+    assert worker.frames.slots[3 % 2]["frame"] is not collected["frame"]
+
+
+def test_busy_process_accumulates_dt(worker):
+    """Mientras el proceso calcula, el `dt` de los frames se suma a la próxima petición"""
+    assert submit(worker, 0.01)
+    assert not submit(worker, 0.02)
+    assert not submit(worker, 0.03)
+    worker.counters[PUBLISHED] = 1
+    worker.latest()
+    assert submit(worker, 0.04)
+    assert worker.frames.header["inputs"][1] == pytest.approx(0.09)